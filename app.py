@@ -1,16 +1,25 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from config import Config
+from db import LAST_WRITE_HEADER
 from routes.product_routes import product_bp
+from routes.kpi_routes import kpi_bp
+from routes.catalog_routes import catalog_bp
+from routes.stocktake_routes import stocktake_bp
+from utils.response_cache import response_cache
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
-# Enable CORS for frontend integration
-CORS(app)
+# Enable CORS for frontend integration; browser clients must be able to read
+# the last-write header to send it back (read-your-writes, see db.py)
+CORS(app, expose_headers=[LAST_WRITE_HEADER])
 
 # Register blueprints
 app.register_blueprint(product_bp, url_prefix='/api')
+app.register_blueprint(kpi_bp, url_prefix='/api')
+app.register_blueprint(catalog_bp, url_prefix='/api')
+app.register_blueprint(stocktake_bp, url_prefix='/api')
 
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
@@ -23,6 +32,14 @@ def health_check():
         "message": "Supermarket Stock Management API is running"
     }), 200
 
+# Response cache statistics (per worker process)
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Hit/miss statistics of the server-side response cache.
+    """
+    return jsonify(response_cache.stats()), 200
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
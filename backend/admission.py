@@ -0,0 +1,174 @@
+# admission.py
+# Admission control for checkout bursts. At most max_inflight requests run at
+# once; the rest wait in a short queue per terminal, served round-robin so one
+# busy till cannot starve the others. When the queue is full, or a request
+# waits longer than max_wait, it gets a fast 503 with Retry-After instead of
+# piling up on row locks in MySQL.
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import wraps
+
+from flask import jsonify
+
+# Samples kept for the wait time / service time metrics
+SAMPLE_SIZE = 1000
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+    def __init__(self, max_inflight, max_queue, max_queue_per_key, max_wait):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.max_queue_per_key = max_queue_per_key
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._queues = OrderedDict()     # key -> deque of waiters, in round-robin order
+        self._queued = 0
+
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._peak_queue = 0
+        self._waits = deque(maxlen=SAMPLE_SIZE)
+        self._service_times = deque(maxlen=SAMPLE_SIZE)
+
+    def acquire(self, key):
+        """Wait for a slot. Returns True when admitted, False when rejected."""
+        started = time.monotonic()
+        with self._lock:
+            if self._inflight < self.max_inflight and not self._queued:
+                self._inflight += 1
+                self._admit(0.0)
+                return True
+            queue = self._queues.get(key)
+            if self._queued >= self.max_queue or (queue and len(queue) >= self.max_queue_per_key):
+                self._rejected += 1
+                return False
+            waiter = _Waiter()
+            if queue is None:
+                queue = self._queues[key] = deque()
+            queue.append(waiter)
+            self._queued += 1
+            self._peak_queue = max(self._peak_queue, self._queued)
+
+        waiter.event.wait(self.max_wait)
+
+        with self._lock:
+            if waiter.granted:
+                self._admit(time.monotonic() - started)
+                return True
+            queue = self._queues.get(key)
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[key]
+            self._queued -= 1
+            self._timed_out += 1
+            return False
+
+    def release(self, service_time):
+        """Free a slot, handing it straight to the next terminal in turn"""
+        with self._lock:
+            self._service_times.append(service_time)
+            if not self._queues:
+                self._inflight -= 1
+                return
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            self._queued -= 1
+            waiter.granted = True
+            waiter.event.set()
+
+    def _admit(self, wait):
+        self._admitted += 1
+        self._waits.append(wait)
+
+    def retry_after(self):
+        """Seconds a rejected client should wait: time to drain the current queue"""
+        with self._lock:
+            service = sum(self._service_times) / len(self._service_times) if self._service_times else 1.0
+            backlog = self._queued + self._inflight
+        return max(1, math.ceil(service * backlog / self.max_inflight))
+
+    def metrics(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            services = list(self._service_times)
+            return {
+                "max_inflight": self.max_inflight,
+                "inflight": self._inflight,
+                "queue_depth": self._queued,
+                "peak_queue_depth": self._peak_queue,
+                "queued_terminals": len(self._queues),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "wait_ms": {
+                    "avg": _ms(sum(waits) / len(waits)) if waits else 0.0,
+                    "p50": _ms(_percentile(waits, 0.50)),
+                    "p95": _ms(_percentile(waits, 0.95)),
+                    "max": _ms(waits[-1]) if waits else 0.0,
+                },
+                "service_ms_avg": _ms(sum(services) / len(services)) if services else 0.0,
+            }
+
+    def limit(self, key_func):
+        """Decorator for a route: admit through this controller, keyed by key_func()"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.acquire(key_func()):
+                    response = jsonify({'error': 'Too many checkouts in progress, please retry'})
+                    response.status_code = 503
+                    response.headers['Retry-After'] = str(self.retry_after())
+                    return response
+                started = time.monotonic()
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self.release(time.monotonic() - started)
+            return wrapper
+        return decorator
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def per_worker(total, workers):
+    """Share of a whole-service limit for one of `workers` processes, at least 1"""
+    return max(1, total // max(1, workers))
+
+
+# Each worker process has its own controller. POS_MAX_INFLIGHT and
+# POS_MAX_QUEUE are for the whole service, split across POS_WORKERS processes
+# (set it to the server's worker count, e.g. gunicorn -w).
+WORKERS = int(os.environ.get("POS_WORKERS", 1))
+
+checkout_admission = AdmissionController(
+    max_inflight=per_worker(int(os.environ.get("POS_MAX_INFLIGHT", 8)), WORKERS),
+    max_queue=per_worker(int(os.environ.get("POS_MAX_QUEUE", 64)), WORKERS),
+    max_queue_per_key=int(os.environ.get("POS_MAX_QUEUE_PER_TERMINAL", 4)),
+    max_wait=float(os.environ.get("POS_MAX_WAIT", 2.0)),
+)
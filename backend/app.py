@@ -1,19 +1,40 @@
 # app.py
-from flask import Flask
+from flask import Flask, jsonify
 from routes.pos_transaction import pos_bp
 from routes.users import users_bp
+from routes.reorder import reorder_bp
+from routes.jobs import jobs_bp
+from routes.stores import stores_bp
 from flask_cors import CORS
+from db import LAST_WRITE_HEADER
+import search_index
+from response_cache import response_cache
 
 app = Flask(__name__)
-CORS(app)
+# Browser clients must be able to read the last-write header to send it back
+# (read-your-writes, see db.py)
+CORS(app, expose_headers=[LAST_WRITE_HEADER])
+
+# Build the search index in the background of every process serving the app
+# (python app.py, flask run, gunicorn workers); /pos/search answers 503 until
+# the first build is done
+search_index.start_sync()
 
 @app.route("/")
 def home():
     return "Flask backend is running!"
 
+@app.route("/cache/stats")
+def cache_stats():
+    """Hit/miss statistics of the response cache in this worker process"""
+    return jsonify(response_cache.stats())
+
 # Register blueprints
 app.register_blueprint(pos_bp)
 app.register_blueprint(users_bp)
+app.register_blueprint(reorder_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(stores_bp)
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
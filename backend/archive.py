@@ -0,0 +1,197 @@
+# archive.py
+# Moves closed months of transactions / transaction_items out of the hot
+# tables into monthly-partitioned archive tables, in small batches so the POS
+# never waits on long locks. Reads that need older data go through
+# transaction_sources() / sold_items() and span both.
+#
+# Run with: python archive.py   (normally scheduled through tasks.py)
+import logging
+import threading
+import time
+from datetime import date, datetime
+
+from db import get_connection, MAX_REPLICA_LAG
+
+log = logging.getLogger(__name__)
+
+# Months kept in the hot tables, counting the current one
+HOT_MONTHS = 3
+# Transactions moved per batch (one short transaction each)
+BATCH_SIZE = 500
+# Seconds to pause between batches, leaves room for checkout traffic
+BATCH_PAUSE = 0.05
+# Seconds the archive boundary is cached by readers
+BOUNDARY_TTL = 60
+
+_boundary_lock = threading.Lock()
+_boundary = (None, 0.0)     # (archived_before, loaded_at)
+
+
+def _month_start(day, months_back=0):
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def archived_before(conn=None):
+    """Transactions before this date may be in the archive tables (None: nothing archived)"""
+    global _boundary
+    with _boundary_lock:
+        value, loaded_at = _boundary
+        if loaded_at and time.monotonic() - loaded_at < BOUNDARY_TTL:
+            return value
+
+    own_conn = conn is None
+    conn = conn or get_connection(read_only=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT archived_before FROM archive_state WHERE name = 'transactions'")
+        row = cursor.fetchone()
+        cursor.close()
+    finally:
+        if own_conn:
+            conn.close()
+
+    value = row[0] if row else None
+    with _boundary_lock:
+        _boundary = (value, time.monotonic())
+    return value
+
+
+def transaction_sources(start):
+    """Transaction tables holding rows dated on or after `start` (None: all history)"""
+    boundary = archived_before()
+    if boundary is not None and (start is None or _as_date(start) < boundary):
+        return ["transactions", "transactions_archive"]
+    return ["transactions"]
+
+
+def sold_items(start, end):
+    """
+    SQL for a derived table of (product_id, transaction_date, quantity) sold in
+    [start, end), spanning hot and archived data as needed. Returns (sql, params).
+    """
+    parts = ["""
+        SELECT ti.product_id, t.transaction_date, ti.quantity
+        FROM transaction_items ti
+        JOIN transactions t ON t.transaction_id = ti.transaction_id
+        WHERE t.transaction_date >= %s AND t.transaction_date < %s
+    """]
+    if "transactions_archive" in transaction_sources(start):
+        parts.append("""
+            SELECT product_id, transaction_date, quantity
+            FROM transaction_items_archive
+            WHERE transaction_date >= %s AND transaction_date < %s
+        """)
+    return " UNION ALL ".join(parts), [start, end] * len(parts)
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def run(hot_months=HOT_MONTHS, batch_size=BATCH_SIZE, max_batches=None):
+    """
+    Archive every transaction dated before the hot window. Safe to stop and
+    re-run at any point: each batch is copied and deleted in one transaction.
+    Returns the number of transactions archived.
+    """
+    cutoff = _month_start(date.today(), hot_months - 1)
+    conn = get_connection()
+    cursor = conn.cursor()
+    archived = 0
+    try:
+        cursor.execute("SELECT MIN(transaction_date) FROM transactions WHERE transaction_date < %s", (cutoff,))
+        oldest = cursor.fetchone()[0]
+        if oldest is None:
+            return 0
+        _add_partitions(cursor, _month_start(oldest.date()), cutoff)
+
+        # Move the read boundary first, then wait until no reader can still
+        # hold the old one (cached for BOUNDARY_TTL, possibly read from a
+        # replica up to MAX_REPLICA_LAG behind) before any rows move
+        cursor.execute("SELECT archived_before FROM archive_state WHERE name = 'transactions'")
+        row = cursor.fetchone()
+        cursor.execute("""
+            INSERT INTO archive_state (name, archived_before) VALUES ('transactions', %s)
+            ON DUPLICATE KEY UPDATE archived_before = GREATEST(archived_before, VALUES(archived_before))
+        """, (cutoff,))
+        conn.commit()
+        if row is None or row[0] is None or row[0] < cutoff:
+            log.info("archive boundary moved to %s, waiting for readers to pick it up", cutoff)
+            time.sleep(BOUNDARY_TTL + MAX_REPLICA_LAG)
+
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            cursor.execute("""
+                SELECT transaction_id FROM transactions
+                WHERE transaction_date < %s
+                ORDER BY transaction_id
+                LIMIT %s
+                FOR UPDATE
+            """, (cutoff, batch_size))
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                conn.commit()
+                break
+
+            in_ids = ", ".join(["%s"] * len(ids))
+            cursor.execute(f"""
+                INSERT IGNORE INTO transactions_archive
+                    (transaction_id, worker_id, total_amount, payment_method, transaction_date, store_id)
+                SELECT transaction_id, worker_id, total_amount, payment_method, transaction_date, store_id
+                FROM transactions WHERE transaction_id IN ({in_ids})
+            """, ids)
+            cursor.execute(f"""
+                INSERT IGNORE INTO transaction_items_archive
+                    (transaction_id, product_id, quantity, transaction_date)
+                SELECT ti.transaction_id, ti.product_id, ti.quantity, t.transaction_date
+                FROM transaction_items ti
+                JOIN transactions t ON t.transaction_id = ti.transaction_id
+                WHERE ti.transaction_id IN ({in_ids})
+            """, ids)
+            cursor.execute(f"DELETE FROM transaction_items WHERE transaction_id IN ({in_ids})", ids)
+            cursor.execute(f"DELETE FROM transactions WHERE transaction_id IN ({in_ids})", ids)
+            conn.commit()
+
+            archived += len(ids)
+            batches += 1
+            time.sleep(BATCH_PAUSE)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    log.info("archived %d transactions dated before %s", archived, cutoff)
+    return archived
+
+
+def _add_partitions(cursor, first_month, cutoff):
+    """Split a partition per month in [first_month, cutoff) off the empty pmax partition"""
+    for table in ("transactions_archive", "transaction_items_archive"):
+        cursor.execute("""
+            SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (table,))
+        # Ranges can only be split off above the last monthly partition;
+        # older stragglers fall into the first partition that covers them
+        last = max((name for name in (row[0] for row in cursor.fetchall()) if name != "pmax"), default="")
+
+        month = first_month
+        while month < cutoff:
+            following = _month_start(month, -1)
+            name = f"p{month:%Y%m}"
+            if name > last:
+                cursor.execute(f"""
+                    ALTER TABLE {table} REORGANIZE PARTITION pmax INTO (
+                        PARTITION {name} VALUES LESS THAN (TO_DAYS('{following:%Y-%m-%d}')),
+                        PARTITION pmax VALUES LESS THAN MAXVALUE
+                    )
+                """)
+            month = following
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run()
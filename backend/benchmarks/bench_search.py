@@ -0,0 +1,101 @@
+"""
+Benchmark: ProductSearchIndex on a synthetic 100k-SKU catalog. Reports the
+mean and worst latency per query and fails when any query's mean is not
+under TARGET_MS.
+
+Run from backend/:
+    python -m benchmarks.bench_search
+"""
+import random
+import statistics
+import sys
+import time
+
+from search_index import ProductSearchIndex
+
+TARGET_MS = 1.0
+
+WORDS = (
+    "fresh frozen organic whole skim low fat free range large small mini family "
+    "apple banana orange lemon lime mango melon grape berry cherry peach pear plum "
+    "milk cream butter cheese yogurt egg bread bagel bun roll wrap cake cookie "
+    "cracker chips crisps nuts almond cashew peanut walnut raisin oat rice pasta "
+    "noodle flour sugar salt pepper spice sauce ketchup mustard mayo oil vinegar "
+    "honey jam syrup coffee tea cocoa chocolate candy gum juice soda water tonic "
+    "beer wine chicken beef pork lamb turkey ham bacon sausage fish salmon tuna "
+    "shrimp tofu bean lentil pea corn carrot potato tomato onion garlic lettuce "
+    "spinach kale broccoli pepper mushroom soap shampoo tissue towel detergent "
+    "bleach sponge foil bag battery bulb candle diaper wipes toothpaste brush"
+).split()
+CATEGORIES = ("dairy bakery produce meat seafood frozen drinks snacks pantry "
+              "household personal baby pets deli").split()
+UNITS = ("g", "kg", "ml", "l", "pk", "ct", "")
+
+QUERIES = [
+    "a", "b", "7", "ab", "me", "fr", "ch", "da", "dairy", "milk", "choc",
+    "a b", "a b c", "x y z", "me fr", "7 8", "1 2 3", "fresh milk", "dairy milk 1",
+    "organic apple juice", "600", "6001", "60012", "chese", "chocl", "choclate",
+    "mlk", "zzzz", "qqq www",
+]
+
+
+def build_catalog(size=100000, seed=1):
+    rng = random.Random(seed)
+    brands = ["".join(rng.choice("bcdfghjklmnprstvz") + rng.choice("aeiou") for _ in range(3))
+              for _ in range(2000)]
+    products = []
+    for product_id in range(1, size + 1):
+        words = rng.sample(WORDS, rng.randint(2, 4))
+        name = f"{rng.choice(brands)} {' '.join(words)} {rng.choice([50, 100, 250, 500, 750, 1000, 2])}{rng.choice(UNITS)}"
+        # Half the barcodes share the 600 (South Africa) prefix, like a real catalog
+        prefix = "600" if rng.random() < 0.5 else str(rng.randint(100, 999))
+        products.append({
+            "id": product_id,
+            "barcode": prefix + f"{rng.randrange(10 ** 10):010d}",
+            "name": name.title(),
+            "category": rng.choice(CATEGORIES).title(),
+            "selling_price": round(rng.uniform(0.5, 50), 2),
+            "quantity_in_stock": rng.choice([0] + [rng.randint(1, 50)] * 9),
+        })
+    sales = {p["id"]: rng.randint(1, 1000) for p in products if rng.random() < 0.4}
+    return products, sales
+
+
+def main(size=100000, runs=50):
+    products, sales = build_catalog(size)
+    index = ProductSearchIndex()
+    started = time.perf_counter()
+    for product in products:
+        index.add(product)
+    index.set_sales(sales)
+    index.rerank()
+    print(f"built {size} products in {time.perf_counter() - started:.2f} s")
+
+    started = time.perf_counter()
+    index.rerank()
+    print(f"rerank in {time.perf_counter() - started:.2f} s")
+
+    # A realistic trickle of writes since the last rerank
+    rng = random.Random(2)
+    for product in rng.sample(products, 100):
+        index.add(dict(product, quantity_in_stock=product["quantity_in_stock"] + 1))
+
+    slowest = 0.0
+    for query in QUERIES:
+        index.search(query)     # warm-up
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            results = index.search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        mean = statistics.mean(timings)
+        slowest = max(slowest, mean)
+        print(f"{query!r:22} mean {mean:6.3f} ms   max {max(timings):6.3f} ms   {len(results):3} results")
+
+    ok = slowest < TARGET_MS
+    print(f"slowest mean {slowest:.3f} ms: {'OK' if ok else 'FAIL'} (target {TARGET_MS} ms)")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
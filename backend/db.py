@@ -1,9 +1,200 @@
+import math
+import os
+import threading
+import time
+
 import mysql.connector
 
-def get_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",     # your MySQL password
-        database="stock_db"
+# Primary (read/write) server
+PRIMARY = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "port": int(os.environ.get("DB_PORT", 3306)),
+    "user": os.environ.get("DB_USER", "root"),
+    "password": os.environ.get("DB_PASSWORD", ""),     # your MySQL password
+    "database": os.environ.get("DB_NAME", "stock_db"),
+}
+
+# Read replicas, e.g. DB_REPLICAS="127.0.0.1:3307,127.0.0.1:3308"
+REPLICAS = [
+    dict(PRIMARY, host=host, port=int(port or 3306))
+    for host, _, port in (
+        entry.strip().partition(":")
+        for entry in os.environ.get("DB_REPLICAS", "").split(",")
+        if entry.strip()
     )
+]
+
+# Per-store shards holding store stock and sales, e.g.
+# DB_STORE_SHARDS="1=127.0.0.1:3307/store_1,2=127.0.0.1:3308/store_2".
+# Stores not listed live on the primary.
+def _parse_shards(value):
+    shards = {}
+    for entry in filter(None, (e.strip() for e in value.split(","))):
+        store_id, _, dsn = entry.partition("=")
+        address, _, database = dsn.partition("/")
+        host, _, port = address.partition(":")
+        shards[int(store_id)] = dict(PRIMARY, host=host, port=int(port or 3306),
+                                     database=database or PRIMARY["database"])
+    return shards
+
+
+STORE_SHARDS = _parse_shards(os.environ.get("DB_STORE_SHARDS", ""))
+
+# After a write, the same client reads from the primary for this many seconds
+STICKY_SECONDS = float(os.environ.get("DB_STICKY_SECONDS", 5))
+# The time of a client's last write travels with the client, so stickiness
+# holds across worker processes and services: in this header, which the
+# frontend's ApiService sends back on every request (CORS exposes it), or in
+# this cookie for same-origin browser clients
+LAST_WRITE_COOKIE = "db_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+# Replicas lagging more than this many seconds are taken out of rotation
+MAX_REPLICA_LAG = float(os.environ.get("DB_MAX_REPLICA_LAG", 2))
+# How often each replica's lag is re-checked, from a background thread
+LAG_CHECK_INTERVAL = float(os.environ.get("DB_LAG_CHECK_INTERVAL", 5))
+# Seconds a lag check may wait to connect to a replica
+LAG_CHECK_TIMEOUT = int(os.environ.get("DB_LAG_CHECK_TIMEOUT", 2))
+
+_lock = threading.Lock()
+_replica_health = {}     # replica index -> (checked_at, healthy)
+_next_replica = 0
+_lag_monitor = None
+
+
+def get_connection(read_only=False):
+    """
+    Return a connection to the primary, or to a healthy replica when
+    read_only is set and the current client has not written recently.
+    """
+    if read_only and REPLICAS and not is_sticky_request():
+        conn = _replica_connection()
+        if conn:
+            return conn
+    elif not read_only:
+        _note_write()
+    return mysql.connector.connect(**PRIMARY)
+
+
+def get_store_connection(store_id, read_only=False):
+    """
+    Return a connection to the shard holding a store's stock and sales.
+    Stores without a shard use the primary, or a replica for read_only
+    callers, exactly as get_connection(). The product catalog always stays
+    on the primary.
+    """
+    shard = STORE_SHARDS.get(int(store_id))
+    if shard is None:
+        return get_connection(read_only=read_only)
+    return mysql.connector.connect(**shard)
+
+
+def is_sticky_request():
+    """
+    True when the client of the current request wrote within STICKY_SECONDS,
+    in this request or (per its cookie/header) in an earlier one.
+    """
+    try:
+        from flask import g, has_request_context, request
+    except ImportError:
+        return False
+    if not has_request_context():
+        return False
+    if g.get("db_written_at"):
+        return True
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        written_at = float(value)
+    except (TypeError, ValueError):
+        return False
+    return 0 <= time.time() - written_at < STICKY_SECONDS
+
+
+def _note_write():
+    """Hand the client the time of this write, once per request"""
+    try:
+        from flask import after_this_request, g, has_request_context
+    except ImportError:
+        return
+    if not has_request_context() or g.get("db_written_at"):
+        return
+    g.db_written_at = written_at = f"{time.time():.3f}"
+
+    @after_this_request
+    def remember_write(response):
+        response.set_cookie(LAST_WRITE_COOKIE, written_at, max_age=math.ceil(STICKY_SECONDS),
+                            httponly=True, samesite="Lax")
+        response.headers[LAST_WRITE_HEADER] = written_at
+        return response
+
+
+def _replica_connection():
+    """Round-robin over replicas, skipping unreachable or lagging ones"""
+    global _next_replica
+    for _ in range(len(REPLICAS)):
+        with _lock:
+            index = _next_replica % len(REPLICAS)
+            _next_replica += 1
+        if not _replica_is_healthy(index):
+            continue
+        try:
+            return mysql.connector.connect(**REPLICAS[index])
+        except mysql.connector.Error:
+            _mark_replica(index, False)
+    return None
+
+
+def _replica_is_healthy(index):
+    """
+    Health as last seen by the lag monitor. Requests never check lag
+    themselves; a replica with no recent check is skipped.
+    """
+    _start_lag_monitor()
+    checked = _replica_health.get(index)
+    return bool(checked and checked[1] and time.monotonic() - checked[0] < 3 * LAG_CHECK_INTERVAL)
+
+
+def _start_lag_monitor():
+    global _lag_monitor
+    if _lag_monitor is not None:
+        return
+    with _lock:
+        if _lag_monitor is None:
+            _lag_monitor = threading.Thread(target=_monitor_replica_lag, name="replica-lag-monitor",
+                                            daemon=True)
+            _lag_monitor.start()
+
+
+def _monitor_replica_lag():
+    while True:
+        for index in range(len(REPLICAS)):
+            _mark_replica(index, _check_replica_lag(index))
+        time.sleep(LAG_CHECK_INTERVAL)
+
+
+def _mark_replica(index, healthy):
+    _replica_health[index] = (time.monotonic(), healthy)
+    return healthy
+
+
+def _check_replica_lag(index):
+    """A replica is healthy when replication runs and lag is under MAX_REPLICA_LAG"""
+    conn = None
+    try:
+        conn = mysql.connector.connect(**REPLICAS[index], connection_timeout=LAG_CHECK_TIMEOUT)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            # MySQL < 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        status = cursor.fetchone()
+        cursor.close()
+        if not status:
+            return False
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return lag is not None and lag <= MAX_REPLICA_LAG
+    except mysql.connector.Error:
+        return False
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
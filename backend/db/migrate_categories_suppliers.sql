@@ -0,0 +1,39 @@
+-- migrate_categories_suppliers.sql
+-- Moves the free-text products.category / products.supplier values into
+-- the normalized categories and suppliers tables. Safe to run once on an
+-- existing database created from an older tables.sql.
+
+CREATE TABLE IF NOT EXISTS categories (
+    category_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS suppliers (
+    supplier_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL UNIQUE
+);
+
+ALTER TABLE products
+    ADD COLUMN category_id INT NULL AFTER category,
+    ADD COLUMN supplier_id INT NULL AFTER supplier;
+
+INSERT IGNORE INTO categories (name)
+SELECT DISTINCT category FROM products WHERE category <> '';
+
+INSERT IGNORE INTO suppliers (name)
+SELECT DISTINCT supplier FROM products WHERE supplier IS NOT NULL AND supplier <> '';
+
+UPDATE products p
+JOIN categories c ON c.name = p.category
+SET p.category_id = c.category_id;
+
+UPDATE products p
+JOIN suppliers s ON s.name = p.supplier
+SET p.supplier_id = s.supplier_id;
+
+ALTER TABLE products
+    ADD CONSTRAINT fk_products_category FOREIGN KEY (category_id) REFERENCES categories(category_id),
+    ADD CONSTRAINT fk_products_supplier FOREIGN KEY (supplier_id) REFERENCES suppliers(supplier_id);
+
+-- The supplier rows of inventory_kpis are filled in by the backend's
+-- next KPI drift check (kpi.recompute).
@@ -0,0 +1,6 @@
+-- migrate_jobs_heartbeat.sql
+-- Adds jobs.heartbeat_at: workers refresh it for their running jobs, and a
+-- running job without a recent heartbeat is failed as lost.
+
+ALTER TABLE jobs
+    ADD COLUMN heartbeat_at DATETIME NULL COMMENT 'Refreshed by the worker running the job' AFTER started_at;
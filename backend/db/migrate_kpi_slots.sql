@@ -0,0 +1,8 @@
+-- migrate_kpi_slots.sql
+-- Splits every inventory_kpis row over counter slots (see SLOTS in kpi.py).
+-- Existing totals become slot 0; readers sum the slots of each key.
+
+ALTER TABLE inventory_kpis
+    ADD COLUMN slot TINYINT UNSIGNED NOT NULL DEFAULT 0 AFTER dim_key,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (dimension, dim_key, slot);
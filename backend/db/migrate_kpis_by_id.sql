@@ -0,0 +1,23 @@
+-- migrate_kpis_by_id.sql
+-- Re-keys the category and supplier rows of inventory_kpis from the free-text
+-- names to category_id / supplier_id.
+
+START TRANSACTION;
+
+DELETE FROM inventory_kpis WHERE dimension IN ('category', 'supplier');
+
+INSERT INTO inventory_kpis (dimension, dim_key, product_count, stock_value, potential_margin)
+SELECT 'category', CAST(category_id AS CHAR), COUNT(*),
+       SUM(qty * buying_price), SUM(qty * (selling_price - buying_price))
+FROM products
+WHERE category_id IS NOT NULL
+GROUP BY category_id;
+
+INSERT INTO inventory_kpis (dimension, dim_key, product_count, stock_value, potential_margin)
+SELECT 'supplier', CAST(supplier_id AS CHAR), COUNT(*),
+       SUM(qty * buying_price), SUM(qty * (selling_price - buying_price))
+FROM products
+WHERE supplier_id IS NOT NULL
+GROUP BY supplier_id;
+
+COMMIT;
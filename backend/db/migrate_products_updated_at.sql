@@ -0,0 +1,7 @@
+-- migrate_products_updated_at.sql
+-- Adds products.updated_at, used by the POS search index to pick up
+-- changed products incrementally.
+
+ALTER TABLE products
+    ADD COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ADD INDEX idx_products_updated_at (updated_at);
@@ -0,0 +1,26 @@
+-- migrate_shard_keys.sql
+-- Run on each store shard created from an earlier shard_tables.sql: keys
+-- transactions and transaction_items by (store_id, transaction_id), since
+-- transaction ids alone repeat across shards and the primary.
+
+ALTER TABLE transaction_items
+    DROP FOREIGN KEY fk_items_transaction,
+    ADD COLUMN store_id INT NULL FIRST;
+
+UPDATE transaction_items ti
+JOIN transactions t ON t.transaction_id = ti.transaction_id
+SET ti.store_id = t.store_id;
+
+ALTER TABLE transaction_items
+    MODIFY store_id INT NOT NULL,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (store_id, transaction_id, product_id);
+
+ALTER TABLE transactions
+    ADD INDEX idx_transactions_id (transaction_id),
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (store_id, transaction_id);
+
+ALTER TABLE transaction_items
+    ADD CONSTRAINT fk_items_transaction FOREIGN KEY (store_id, transaction_id)
+        REFERENCES transactions(store_id, transaction_id);
@@ -0,0 +1,20 @@
+-- migrate_stocktake.sql
+-- Adds the stocktake session tables used by the /api/stocktakes endpoints.
+
+CREATE TABLE IF NOT EXISTS stocktake_sessions (
+    session_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open' COMMENT 'open, applied',
+    scan_count INT NOT NULL DEFAULT 0,
+    adjusted_items INT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    applied_at DATETIME NULL
+);
+
+CREATE TABLE IF NOT EXISTS stocktake_counts (
+    session_id INT NOT NULL,
+    barcode VARCHAR(50) NOT NULL,
+    counted_qty INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, barcode),
+    CONSTRAINT fk_stocktake_counts_session FOREIGN KEY (session_id) REFERENCES stocktake_sessions(session_id) ON DELETE CASCADE
+);
@@ -0,0 +1,26 @@
+-- migrate_stores.sql
+-- Adds stores, per-store stock and transactions.store_id to an existing
+-- database. Shards for individual stores are created from shard_tables.sql.
+
+CREATE TABLE IF NOT EXISTS stores (
+    store_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL UNIQUE,
+    address VARCHAR(255),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS store_stock (
+    store_id INT NOT NULL,
+    product_id INT NOT NULL,
+    qty INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (store_id, product_id),
+    CONSTRAINT fk_store_stock_store FOREIGN KEY (store_id) REFERENCES stores(store_id),
+    CONSTRAINT fk_store_stock_product FOREIGN KEY (product_id) REFERENCES products(product_id)
+);
+
+ALTER TABLE transactions
+    ADD COLUMN store_id INT NULL COMMENT 'NULL: central stock',
+    ADD INDEX idx_transactions_store_date (store_id, transaction_date);
+
+ALTER TABLE transactions_archive ADD COLUMN store_id INT NULL;
@@ -0,0 +1,34 @@
+-- migrate_transactions_archive.sql
+-- Adds the archive tables used by archive.py to an existing database.
+
+ALTER TABLE transactions ADD INDEX idx_transactions_date (transaction_date);
+
+CREATE TABLE IF NOT EXISTS transactions_archive (
+    transaction_id INT NOT NULL,
+    worker_id INT NOT NULL,
+    total_amount DECIMAL(10,2) NOT NULL,
+    payment_method VARCHAR(20) NOT NULL,
+    transaction_date DATETIME NOT NULL,
+    PRIMARY KEY (transaction_id, transaction_date),
+    INDEX idx_transactions_archive_date (transaction_date)
+)
+PARTITION BY RANGE (TO_DAYS(transaction_date)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS transaction_items_archive (
+    transaction_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    transaction_date DATETIME NOT NULL,
+    PRIMARY KEY (transaction_id, product_id, transaction_date),
+    INDEX idx_items_archive_date (transaction_date)
+)
+PARTITION BY RANGE (TO_DAYS(transaction_date)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS archive_state (
+    name VARCHAR(50) PRIMARY KEY,
+    archived_before DATE NOT NULL
+);
@@ -0,0 +1,37 @@
+-- shard_tables.sql
+-- Schema of a store shard (see DB_STORE_SHARDS in db.py). A shard holds the
+-- stock and sales of its stores only; users, products and categories stay on
+-- the primary, so there are no foreign keys to them here.
+
+CREATE TABLE store_stock (
+    store_id INT NOT NULL,
+    product_id INT NOT NULL,
+    qty INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (store_id, product_id)
+);
+
+-- Every shard numbers its transactions from its own AUTO_INCREMENT, so a
+-- transaction_id alone is not unique across shards and the primary: a sale is
+-- identified by (store_id, transaction_id).
+CREATE TABLE transactions (
+    store_id INT NOT NULL,
+    transaction_id INT NOT NULL AUTO_INCREMENT,
+    worker_id INT NOT NULL,
+    total_amount DECIMAL(10,2) NOT NULL,
+    payment_method VARCHAR(20) NOT NULL COMMENT 'Cash / Card',
+    transaction_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (store_id, transaction_id),
+    INDEX idx_transactions_id (transaction_id),
+    INDEX idx_transactions_store_date (store_id, transaction_date)
+);
+
+CREATE TABLE transaction_items (
+    store_id INT NOT NULL,
+    transaction_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    PRIMARY KEY (store_id, transaction_id, product_id),
+    CONSTRAINT fk_items_transaction FOREIGN KEY (store_id, transaction_id)
+        REFERENCES transactions(store_id, transaction_id)
+);
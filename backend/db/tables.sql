@@ -18,12 +18,25 @@ CREATE TABLE users (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Categories table
+CREATE TABLE categories (
+    category_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE
+);
+
+-- Suppliers table
+CREATE TABLE suppliers (
+    supplier_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL UNIQUE
+);
+
 -- Products table
 CREATE TABLE products (
     product_id INT AUTO_INCREMENT PRIMARY KEY,
     barcode VARCHAR(50) NOT NULL UNIQUE,
     name VARCHAR(100) NOT NULL UNIQUE,
     category VARCHAR(50) NOT NULL,
+    category_id INT NULL,
     quantity_in_stock INT NOT NULL DEFAULT 0,
     qty INT NOT NULL DEFAULT 0,
     unit VARCHAR(20) NOT NULL DEFAULT 'piece',
@@ -31,11 +44,36 @@ CREATE TABLE products (
     selling_price DECIMAL(10,2) NOT NULL,
     expiry_date DATE NULL,
     supplier VARCHAR(100) NULL,
+    supplier_id INT NULL,
     status VARCHAR(20) NOT NULL DEFAULT 'In stock',
     description TEXT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_products_updated_at (updated_at),
+    CONSTRAINT fk_products_category FOREIGN KEY (category_id) REFERENCES categories(category_id),
+    CONSTRAINT fk_products_supplier FOREIGN KEY (supplier_id) REFERENCES suppliers(supplier_id)
+);
+
+
+-- Stores
+CREATE TABLE stores (
+    store_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL UNIQUE,
+    address VARCHAR(255),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Per-store stock levels. For a sharded store this table lives on the
+-- store's shard (see shard_tables.sql); products.qty is the central stock.
+CREATE TABLE store_stock (
+    store_id INT NOT NULL,
+    product_id INT NOT NULL,
+    qty INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (store_id, product_id),
+    CONSTRAINT fk_store_stock_store FOREIGN KEY (store_id) REFERENCES stores(store_id),
+    CONSTRAINT fk_store_stock_product FOREIGN KEY (product_id) REFERENCES products(product_id)
+);
 
 -- Transactions table
 CREATE TABLE transactions (
@@ -44,6 +82,9 @@ CREATE TABLE transactions (
     total_amount DECIMAL(10,2) NOT NULL,
     payment_method VARCHAR(20) NOT NULL COMMENT 'Cash / Card',
     transaction_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    store_id INT NULL COMMENT 'NULL: central stock',
+    INDEX idx_transactions_date (transaction_date),
+    INDEX idx_transactions_store_date (store_id, transaction_date),
     CONSTRAINT fk_transactions_user FOREIGN KEY (worker_id) REFERENCES users(user_id)
 );
 
@@ -56,3 +97,104 @@ CREATE TABLE transaction_items (
     CONSTRAINT fk_items_transaction FOREIGN KEY (transaction_id) REFERENCES transactions(transaction_id),
     CONSTRAINT fk_items_product FOREIGN KEY (product_id) REFERENCES products(product_id)
 );
+
+-- Inventory KPI summary, maintained by deltas on product writes and checkouts.
+-- Each (dimension, dim_key) is split over counter slots that are summed on read,
+-- so concurrent writers do not all queue on one row.
+CREATE TABLE inventory_kpis (
+    dimension VARCHAR(20) NOT NULL COMMENT 'total, status, category, supplier',
+    dim_key VARCHAR(100) NOT NULL COMMENT 'status name, category_id or supplier_id',
+    slot TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    product_count INT NOT NULL DEFAULT 0,
+    stock_value DECIMAL(14,2) NOT NULL DEFAULT 0,
+    potential_margin DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, dim_key, slot)
+);
+
+-- Reorder suggestions, rewritten in bulk by forecast.py
+CREATE TABLE reorder_suggestions (
+    product_id INT PRIMARY KEY,
+    avg_daily_demand DECIMAL(12,4) NOT NULL,
+    lead_time_demand DECIMAL(12,4) NOT NULL,
+    safety_stock DECIMAL(12,4) NOT NULL,
+    reorder_point DECIMAL(12,4) NOT NULL,
+    suggested_qty INT NOT NULL,
+    stockout_risk DECIMAL(5,4) NOT NULL,
+    computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_reorder_risk (stockout_risk),
+    CONSTRAINT fk_reorder_product FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+);
+
+-- Background jobs, claimed by worker.py
+CREATE TABLE jobs (
+    job_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' COMMENT 'queued, running, succeeded, failed',
+    payload JSON NULL,
+    run_at DATETIME NOT NULL,
+    schedule_key VARCHAR(100) NULL COMMENT 'Set for cron runs, stops workers scheduling a run twice',
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 3,
+    claimed_by VARCHAR(100) NULL,
+    started_at DATETIME NULL,
+    heartbeat_at DATETIME NULL COMMENT 'Refreshed by the worker running the job',
+    finished_at DATETIME NULL,
+    duration_ms INT NULL,
+    last_error TEXT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_jobs_schedule_key (schedule_key),
+    INDEX idx_jobs_claim (status, run_at)
+);
+
+-- Archived transactions (closed months), moved here by archive.py.
+-- Monthly partitions are split off pmax as months are archived.
+CREATE TABLE transactions_archive (
+    transaction_id INT NOT NULL,
+    worker_id INT NOT NULL,
+    total_amount DECIMAL(10,2) NOT NULL,
+    payment_method VARCHAR(20) NOT NULL,
+    transaction_date DATETIME NOT NULL,
+    store_id INT NULL,
+    PRIMARY KEY (transaction_id, transaction_date),
+    INDEX idx_transactions_archive_date (transaction_date)
+)
+PARTITION BY RANGE (TO_DAYS(transaction_date)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE transaction_items_archive (
+    transaction_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    transaction_date DATETIME NOT NULL,
+    PRIMARY KEY (transaction_id, product_id, transaction_date),
+    INDEX idx_items_archive_date (transaction_date)
+)
+PARTITION BY RANGE (TO_DAYS(transaction_date)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- Archive progress: rows dated before archived_before may be archived
+CREATE TABLE archive_state (
+    name VARCHAR(50) PRIMARY KEY,
+    archived_before DATE NOT NULL
+);
+
+-- Stocktake (cycle count) sessions and their summed scans, see models/stocktake.py
+CREATE TABLE stocktake_sessions (
+    session_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open' COMMENT 'open, applied',
+    scan_count INT NOT NULL DEFAULT 0,
+    adjusted_items INT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    applied_at DATETIME NULL
+);
+
+CREATE TABLE stocktake_counts (
+    session_id INT NOT NULL,
+    barcode VARCHAR(50) NOT NULL,
+    counted_qty INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, barcode),
+    CONSTRAINT fk_stocktake_counts_session FOREIGN KEY (session_id) REFERENCES stocktake_sessions(session_id) ON DELETE CASCADE
+);
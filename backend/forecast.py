@@ -0,0 +1,156 @@
+# forecast.py
+# Batch job computing demand forecasts, safety stock and reorder points for
+# the whole catalog at once. Sales history is streamed into a products x days
+# NumPy matrix and every statistic is a vectorized pass over it.
+#
+# Run with: python forecast.py
+import logging
+from datetime import date, timedelta
+
+import numpy as np
+
+import archive
+from db import get_connection
+
+log = logging.getLogger(__name__)
+
+# Days of sales history loaded (whole weeks, for the weekday profile)
+HISTORY_DAYS = 26 * 7
+# Window of the moving-average daily demand
+MOVING_AVERAGE_DAYS = 28
+# Days between placing an order and receiving it
+LEAD_TIME_DAYS = 7
+# Days an order has to cover beyond the lead time
+REVIEW_DAYS = 7
+# z-score of the cycle service level (1.65 ~ 95%)
+SERVICE_LEVEL_Z = 1.65
+
+FETCH_SIZE = 10000
+WRITE_BATCH_SIZE = 1000
+
+
+def load_history(conn, start, days):
+    """
+    Return (product_ids, stock, demand) where demand[p, d] is the quantity of
+    product_ids[p] sold on day start + d.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id, qty FROM products ORDER BY product_id")
+    catalog = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+    product_ids, stock = catalog[:, 0], catalog[:, 1]
+
+    demand = np.zeros((len(product_ids), days), dtype=np.float64)
+    sold, params = archive.sold_items(start, start + timedelta(days=days))
+    cursor.execute(f"""
+        SELECT product_id, DATEDIFF(transaction_date, %s) AS day, SUM(quantity)
+        FROM ({sold}) s
+        GROUP BY product_id, day
+    """, [start, *params])
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        chunk = np.array(rows, dtype=np.int64)
+        if not len(product_ids):
+            continue
+        rows_idx = np.searchsorted(product_ids, chunk[:, 0]).clip(max=len(product_ids) - 1)
+        # Sales of products deleted since (e.g. only left in the archive) are dropped
+        known = product_ids[rows_idx] == chunk[:, 0]
+        np.add.at(demand, (rows_idx[known], chunk[known, 1]), chunk[known, 2])
+    cursor.close()
+    return product_ids, stock, demand
+
+
+def compute(demand, stock, start):
+    """
+    Compute reorder statistics for every product row of demand.
+    Returns a dict of arrays, one entry per product.
+    """
+    days = demand.shape[1]
+    recent = demand[:, -MOVING_AVERAGE_DAYS:]
+    daily_demand = recent.mean(axis=1)
+    daily_std = recent.std(axis=1)
+
+    # Weekday seasonality: mean demand per weekday relative to the overall mean
+    weekdays = (start.weekday() + np.arange(days)) % 7
+    one_hot = np.eye(7)[weekdays]
+    weekday_mean = (demand @ one_hot) / one_hot.sum(axis=0)
+    overall_mean = demand.mean(axis=1, keepdims=True)
+    seasonal = np.divide(weekday_mean, overall_mean,
+                         out=np.ones_like(weekday_mean), where=overall_mean > 0)
+
+    # Expected demand over the lead time, following the weekday profile
+    lead_weekdays = (start.weekday() + days + np.arange(LEAD_TIME_DAYS)) % 7
+    lead_demand = daily_demand * seasonal[:, lead_weekdays].sum(axis=1)
+    lead_std = daily_std * np.sqrt(LEAD_TIME_DAYS)
+
+    safety_stock = SERVICE_LEVEL_Z * lead_std
+    reorder_point = lead_demand + safety_stock
+    suggested_qty = np.ceil(np.maximum(reorder_point + daily_demand * REVIEW_DAYS - stock, 0))
+
+    # Probability that lead-time demand exceeds stock on hand (normal approximation)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (stock - lead_demand) / (lead_std * np.sqrt(2))
+    stockout_risk = np.where(lead_std > 0, 0.5 * _erfc(z), (lead_demand > stock).astype(float))
+
+    return {
+        "avg_daily_demand": daily_demand,
+        "lead_time_demand": lead_demand,
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+        "suggested_qty": suggested_qty,
+        "stockout_risk": stockout_risk,
+    }
+
+
+def _erfc(x):
+    """Complementary error function, vectorized (fractional error < 1.2e-7)"""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    result = t * np.exp(poly)
+    return np.where(x >= 0, result, 2.0 - result)
+
+
+def save(conn, product_ids, results):
+    """Upsert the results into reorder_suggestions in batches"""
+    columns = list(results)
+    table = np.column_stack([results[c] for c in columns]).round(4).tolist()
+    rows = [(int(pid), *values) for pid, values in zip(product_ids, table)]
+
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM reorder_suggestions")
+    query = f"""
+        INSERT INTO reorder_suggestions (product_id, {', '.join(columns)})
+        VALUES (%s, {', '.join(['%s'] * len(columns))})
+    """
+    for i in range(0, len(rows), WRITE_BATCH_SIZE):
+        cursor.executemany(query, rows[i:i + WRITE_BATCH_SIZE])
+    conn.commit()
+    cursor.close()
+
+
+def run(today=None):
+    """Recompute reorder suggestions for the whole catalog"""
+    today = today or date.today()
+    start = today - timedelta(days=HISTORY_DAYS)
+
+    conn = get_connection()
+    try:
+        product_ids, stock, demand = load_history(conn, start, HISTORY_DAYS)
+        results = compute(demand, stock, start)
+        save(conn, product_ids, results)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    log.info("reorder suggestions computed for %d products", len(product_ids))
+    return len(product_ids)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run()
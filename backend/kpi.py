@@ -0,0 +1,131 @@
+# kpi.py
+# Maintenance of the inventory_kpis summary table (stock value, margin and
+# product counts by status, category and supplier). The API serving it lives in the
+# products service; this side applies checkout deductions and drift checks.
+import logging
+import random
+
+from db import get_connection
+
+log = logging.getLogger(__name__)
+
+# Every summary row is split over this many counter slots, summed on read. A
+# transaction adds its deltas to one random slot, so concurrent checkouts
+# rarely wait on the same row lock (the 'total' row is touched by all of them)
+SLOTS = 16
+
+# Dimensions the summary is broken down by, as (name, key expression on p).
+# Categories and suppliers are keyed by id, not by their free-text names.
+DIMENSIONS = [
+    ("total", "'all'"),
+    ("status", "p.status"),
+    ("category", "CAST(p.category_id AS CHAR)"),
+    ("supplier", "CAST(p.supplier_id AS CHAR)"),
+]
+
+_DIMENSION_TABLE = " UNION ALL ".join(
+    f"SELECT '{name}' AS dimension" for name, _ in DIMENSIONS
+)
+_DIMENSION_KEY = "CASE k.dimension {} END".format(
+    " ".join(f"WHEN '{name}' THEN {expr}" for name, expr in DIMENSIONS)
+)
+
+
+def apply_deduction(cursor, items):
+    """
+    Subtract sold quantities from the stock value and margin totals.
+    items is a list of (product_id, quantity); runs inside the checkout transaction.
+    """
+    if not items:
+        return
+    sold = " UNION ALL ".join(["SELECT %s AS product_id, %s AS quantity"] * len(items))
+    # One slot for all rows and a fixed row order: two checkouts either touch
+    # disjoint rows or lock the same rows in the same order
+    cursor.execute(f"""
+        INSERT INTO inventory_kpis
+            (dimension, dim_key, slot, product_count, stock_value, potential_margin)
+        SELECT dimension, dim_key, %s, 0, -SUM(value), -SUM(margin)
+        FROM (
+            SELECT k.dimension, {_DIMENSION_KEY} AS dim_key,
+                   s.quantity * p.buying_price AS value,
+                   s.quantity * (p.selling_price - p.buying_price) AS margin
+            FROM ({sold}) s
+            JOIN products p ON p.product_id = s.product_id
+            CROSS JOIN ({_DIMENSION_TABLE}) k
+        ) d
+        WHERE dim_key <> ''
+        GROUP BY dimension, dim_key
+        ORDER BY dimension, dim_key
+        ON DUPLICATE KEY UPDATE
+            stock_value = stock_value + VALUES(stock_value),
+            potential_margin = potential_margin + VALUES(potential_margin)
+    """, [random.randrange(SLOTS)] + [value for item in items for value in item])
+
+
+def recompute():
+    """
+    Recompute the summary from a full scan of products and correct any drift.
+
+    The scan and the summary are read from one consistent snapshot, and the
+    correction is applied as a delta, so deltas committed meanwhile are kept.
+    Returns the list of corrected rows.
+    """
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        cursor.execute(f"""
+            SELECT dimension, dim_key,
+                   COUNT(*) AS product_count,
+                   COALESCE(SUM(value), 0) AS stock_value,
+                   COALESCE(SUM(margin), 0) AS potential_margin
+            FROM (
+                SELECT k.dimension, {_DIMENSION_KEY} AS dim_key,
+                       p.qty * p.buying_price AS value,
+                       p.qty * (p.selling_price - p.buying_price) AS margin
+                FROM products p
+                CROSS JOIN ({_DIMENSION_TABLE}) k
+            ) d
+            WHERE dim_key <> ''
+            GROUP BY dimension, dim_key
+        """)
+        actual = {(r["dimension"], r["dim_key"]): r for r in cursor.fetchall()}
+        cursor.execute("""
+            SELECT dimension, dim_key, SUM(product_count) AS product_count,
+                   SUM(stock_value) AS stock_value, SUM(potential_margin) AS potential_margin
+            FROM inventory_kpis
+            GROUP BY dimension, dim_key
+        """)
+        stored = {(r["dimension"], r["dim_key"]): r for r in cursor.fetchall()}
+        conn.commit()
+
+        drift = []
+        for key in actual.keys() | stored.keys():
+            delta = [
+                (actual.get(key) or {}).get(col, 0) - (stored.get(key) or {}).get(col, 0)
+                for col in ("product_count", "stock_value", "potential_margin")
+            ]
+            if any(delta):
+                drift.append((*key, *delta))
+
+        if drift:
+            # Corrections go to slot 0
+            cursor.executemany("""
+                INSERT INTO inventory_kpis
+                    (dimension, dim_key, slot, product_count, stock_value, potential_margin)
+                VALUES (%s, %s, 0, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    product_count = product_count + VALUES(product_count),
+                    stock_value = stock_value + VALUES(stock_value),
+                    potential_margin = potential_margin + VALUES(potential_margin)
+            """, drift)
+            conn.commit()
+            log.warning("inventory_kpis drift corrected on %d rows", len(drift))
+        return drift
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
@@ -0,0 +1,7 @@
+# response_cache.py
+# This service's response cache; the implementation lives in the shared
+# stock_common package (common/ at the repository root).
+from db import is_sticky_request
+from stock_common.response_cache import from_environment
+
+response_cache = from_environment(bypass=is_sticky_request)
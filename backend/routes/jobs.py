@@ -0,0 +1,127 @@
+# routes/jobs.py
+from flask import Blueprint, request, jsonify
+from db import get_connection
+import scheduler
+import tasks  # noqa: F401  (registers the job types)
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def get_jobs():
+    """List recent background jobs, optionally filtered by status and type"""
+    limit = request.args.get('limit', '50')
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({'error': "'limit' must be a positive integer"}), 400
+    limit = min(int(limit), 1000)
+
+    conn = None
+    try:
+        status = request.args.get('status', '')
+        job_type = request.args.get('type', '')
+
+        query = """
+            SELECT job_id, job_type, status, run_at, attempts, max_attempts,
+                   claimed_by, started_at, finished_at, duration_ms, last_error
+            FROM jobs WHERE 1=1
+        """
+        params = []
+        if status:
+            query += " AND status = %s"
+            params.append(status)
+        if job_type:
+            query += " AND job_type = %s"
+            params.append(job_type)
+        query += " ORDER BY job_id DESC LIMIT %s"
+        params.append(limit)
+
+        conn = get_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, params)
+        jobs = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        return jsonify({'jobs': jobs})
+
+    except Exception as err:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(err)}), 500
+
+@jobs_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get a single background job"""
+    conn = None
+    try:
+        conn = get_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM jobs WHERE job_id = %s", (job_id,))
+        job = cursor.fetchone()
+        cursor.close()
+        conn.close()
+
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'job': job})
+
+    except Exception as err:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(err)}), 500
+
+@jobs_bp.route('/jobs/stats', methods=['GET'])
+def get_job_stats():
+    """Per job type: counts by status and durations over the last 24 hours"""
+    conn = None
+    try:
+        conn = get_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT job_type,
+                   SUM(status = 'queued') AS queued,
+                   SUM(status = 'running') AS running,
+                   SUM(status = 'succeeded') AS succeeded,
+                   SUM(status = 'failed') AS failed,
+                   AVG(duration_ms) AS avg_duration_ms,
+                   MAX(duration_ms) AS max_duration_ms,
+                   MAX(finished_at) AS last_finished_at
+            FROM jobs
+            WHERE created_at >= NOW() - INTERVAL 1 DAY OR status IN ('queued', 'running')
+            GROUP BY job_type
+        """)
+        stats = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        for row in stats:
+            for key in ['queued', 'running', 'succeeded', 'failed']:
+                row[key] = int(row[key] or 0)
+            job_type = scheduler.JOB_TYPES.get(row['job_type'])
+            row['max_concurrency'] = job_type.max_concurrency if job_type else None
+
+        return jsonify({'stats': stats})
+
+    except Exception as err:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(err)}), 500
+
+@jobs_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue a background job to run now"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        job_type = data.get('job_type')
+        if job_type not in scheduler.JOB_TYPES:
+            return jsonify({'error': f'Unknown job_type, expected one of {sorted(scheduler.JOB_TYPES)}'}), 400
+        payload, errors = scheduler.JOB_TYPES[job_type].load_payload(data.get('payload'))
+        if errors:
+            return jsonify({'error': '; '.join(errors.values()), 'errors': errors}), 400
+
+        job_id = scheduler.enqueue(job_type, payload)
+        return jsonify({'status': 'queued', 'job_id': job_id}), 202
+
+    except Exception as err:
+        return jsonify({'error': str(err)}), 500
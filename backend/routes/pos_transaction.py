@@ -1,15 +1,25 @@
 # routes/pos_transactions.py
 from flask import Blueprint, request, jsonify
-from db import get_connection
+from db import get_connection, get_store_connection, STORE_SHARDS
+from kpi import apply_deduction
+import search_index
+import archive
+from admission import checkout_admission
+from validators import POS_TRANSACTION_SCHEMA
+from response_cache import response_cache
 import mysql.connector
-from datetime import datetime
+from datetime import datetime, timedelta
 
 pos_bp = Blueprint('pos', __name__)
 
 @pos_bp.route('/pos/products', methods=['GET'])
 def get_pos_products():
-    """POS: Get available products (qty > 0)"""
-    conn = get_connection()
+    """POS: Get available products (qty > 0), from a store's own stock with ?store_id="""
+    store_id = request.args.get('store_id', type=int)
+    if store_id:
+        return jsonify({'products': _store_products(store_id)})
+
+    conn = get_connection(read_only=True)
     cursor = conn.cursor(dictionary=True)
     cursor.execute("""
         SELECT product_id as id, barcode, name, selling_price, qty as quantity_in_stock
@@ -22,23 +32,80 @@ def get_pos_products():
     conn.close()
     return jsonify({'products': products})
 
+def _store_products(store_id):
+    """Store stock comes from the store's shard, product details from the catalog"""
+    conn = get_store_connection(store_id, read_only=True)
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id, qty FROM store_stock WHERE store_id = %s AND qty > 0",
+                   (store_id,))
+    stock = dict(cursor.fetchall())
+    cursor.close()
+    conn.close()
+    if not stock:
+        return []
+
+    conn = get_connection(read_only=True)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT product_id as id, barcode, name, selling_price
+        FROM products
+        WHERE product_id IN ({', '.join(['%s'] * len(stock))})
+        ORDER BY name
+    """, list(stock))
+    products = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    for product in products:
+        product['quantity_in_stock'] = stock[product['id']]
+    return products
+
+@pos_bp.route('/pos/search', methods=['GET'])
+def search_pos_products():
+    """POS: Typeahead search over name, barcode and category (in-stock only)"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return jsonify({'error': "'limit' must be a positive integer"}), 400
+    if not query:
+        return jsonify({'products': []})
+    products = search_index.search(query, limit)
+    if products is None:
+        # The index is still being built (right after start-up)
+        response = jsonify({'error': 'Search index is loading, try again shortly'})
+        response.headers['Retry-After'] = str(search_index.SYNC_INTERVAL)
+        return response, 503
+    return jsonify({'products': products})
+
+def _terminal_key():
+    """Checkout queues are per terminal: X-Terminal-Id, else worker_id, else client IP"""
+    data = request.get_json(silent=True)
+    worker_id = data.get('worker_id') if isinstance(data, dict) else None
+    # str(): the body is not validated yet and the key must be hashable
+    return str(request.headers.get('X-Terminal-Id') or worker_id or request.remote_addr)
+
 @pos_bp.route('/pos/transactions', methods=['POST'])
+@checkout_admission.limit(_terminal_key)
 def create_pos_transaction():
-    """POS: Atomic transaction + stock deduction from qty"""
+    """POS: Atomic transaction + stock deduction (store stock when store_id is given)"""
     conn = None
     try:
-        data = request.get_json()
-        if not data.get('items'):
-            return jsonify({'error': 'Items required'}), 400
+        data, errors = POS_TRANSACTION_SCHEMA.load(request.get_json(silent=True))
+        if errors:
+            return jsonify({'error': '; '.join(errors.values()), 'errors': errors}), 400
             
-        conn = get_connection()
+        # A store's sales and stock live on its own shard
+        store_id = data.get('store_id')
+        conn = get_store_connection(store_id) if store_id else get_connection()
         cursor = conn.cursor()
 
         # Insert main transaction
         cursor.execute("""
-            INSERT INTO transactions (worker_id, total_amount, payment_method, transaction_date) 
-            VALUES (%s, %s, %s, %s)
-        """, (data['worker_id'], data['total_amount'], data['payment_method'], datetime.now()))
+            INSERT INTO transactions (worker_id, total_amount, payment_method, transaction_date, store_id) 
+            VALUES (%s, %s, %s, %s, %s)
+        """, (data['worker_id'], data['total_amount'], data['payment_method'], datetime.now(), store_id))
         transaction_id = cursor.lastrowid
 
         # Atomic: save items + deduct qty
@@ -46,28 +113,41 @@ def create_pos_transaction():
             product_id = item['product_id']
             quantity = item['quantity']
             
-            # Save transaction item
-            cursor.execute("""
-                INSERT INTO transaction_items (transaction_id, product_id, quantity) 
-                VALUES (%s, %s, %s)
-            """, (transaction_id, product_id, quantity))
+            # Save transaction item (shard rows are keyed by store_id too)
+            if store_id in STORE_SHARDS:
+                cursor.execute("""
+                    INSERT INTO transaction_items (store_id, transaction_id, product_id, quantity)
+                    VALUES (%s, %s, %s, %s)
+                """, (store_id, transaction_id, product_id, quantity))
+            else:
+                cursor.execute("""
+                    INSERT INTO transaction_items (transaction_id, product_id, quantity) 
+                    VALUES (%s, %s, %s)
+                """, (transaction_id, product_id, quantity))
             
             # Deduct from qty (fails if insufficient)
-            cursor.execute("""
-                UPDATE products 
-                SET qty = qty - %s 
-                WHERE product_id = %s AND qty >= %s
-            """, (quantity, product_id, quantity))
+            if store_id:
+                cursor.execute("""
+                    UPDATE store_stock 
+                    SET qty = qty - %s 
+                    WHERE store_id = %s AND product_id = %s AND qty >= %s
+                """, (quantity, store_id, product_id, quantity))
+            else:
+                cursor.execute("""
+                    UPDATE products 
+                    SET qty = qty - %s 
+                    WHERE product_id = %s AND qty >= %s
+                """, (quantity, product_id, quantity))
             
             if cursor.rowcount == 0:
                 conn.rollback()
                 return jsonify({'error': f'Insufficient stock for product {product_id}'}), 400
 
+        sold = [(item['product_id'], item['quantity']) for item in data['items']]
+        if not store_id:
+            # Keep the inventory valuation summary in step with the deduction
+            apply_deduction(cursor, sold)
         conn.commit()
-        return jsonify({
-            'status': 'success',
-            'transaction_id': transaction_id
-        }), 201
 
     except Exception as err:
         if conn: conn.rollback()
@@ -76,3 +156,71 @@ def create_pos_transaction():
         if conn and conn.is_connected():
             cursor.close()
             conn.close()
+
+    # The sale is committed: nothing after this point may report it as failed
+    if store_id:
+        search_index.record_sale(sold, deduct_stock=False)
+    else:
+        search_index.record_sale(sold)
+        # Stock changed: drop cached product responses in every worker
+        response_cache.invalidate('product-list', *(f"product:{product_id}" for product_id, _ in sold))
+    return jsonify({
+        'status': 'success',
+        'store_id': store_id,
+        'transaction_id': transaction_id
+    }), 201
+
+@pos_bp.route('/pos/admission', methods=['GET'])
+def get_admission_metrics():
+    """POS: Checkout admission control metrics (in-flight, queue depth, wait times)"""
+    return jsonify(checkout_admission.metrics())
+
+@pos_bp.route('/pos/transactions', methods=['GET'])
+def get_pos_transactions():
+    """POS: Sales history between ?from= and ?to= (YYYY-MM-DD), hot and archived"""
+    conn = None
+    try:
+        date_from = datetime.strptime(request.args['from'], '%Y-%m-%d') if request.args.get('from') else None
+        date_to = datetime.strptime(request.args.get('to') or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d') + timedelta(days=1)
+        limit = request.args.get('limit', '100')
+        if not limit.isdigit() or int(limit) < 1:
+            return jsonify({'error': "'limit' must be a positive integer"}), 400
+        limit = min(int(limit), 1000)
+        store_id = request.args.get('store_id', type=int)
+
+        # Only touch the archive when the range reaches into archived months
+        # (archival runs on the primary; store shards keep their full history)
+        parts = []
+        params = []
+        tables = ['transactions'] if store_id in STORE_SHARDS else archive.transaction_sources(date_from)
+        for table in tables:
+            part = f"""
+                SELECT store_id, transaction_id, worker_id, total_amount, payment_method, transaction_date
+                FROM {table}
+                WHERE transaction_date < %s
+            """
+            params.append(date_to)
+            if date_from:
+                part += " AND transaction_date >= %s"
+                params.append(date_from)
+            if store_id:
+                part += " AND store_id = %s"
+                params.append(store_id)
+            parts.append(part)
+
+        conn = get_store_connection(store_id, read_only=True) if store_id else get_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(" UNION ALL ".join(parts) + " ORDER BY transaction_date DESC LIMIT %s",
+                       params + [limit])
+        transactions = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        return jsonify({'transactions': transactions})
+
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    except Exception as err:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(err)}), 500
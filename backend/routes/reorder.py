@@ -0,0 +1,46 @@
+# routes/reorder.py
+import math
+
+from flask import Blueprint, request, jsonify
+from db import get_connection
+
+reorder_bp = Blueprint('reorder', __name__)
+
+@reorder_bp.route('/reorder/suggestions', methods=['GET'])
+def get_reorder_suggestions():
+    """Suggested reorder quantities, highest stock-out risk first (see forecast.py)"""
+    limit = request.args.get('limit', '50')
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({'error': "'limit' must be a positive integer"}), 400
+    limit = min(int(limit), 1000)
+    try:
+        min_risk = float(request.args.get('min_risk', 0))
+    except ValueError:
+        min_risk = -1
+    if not math.isfinite(min_risk) or min_risk < 0:
+        return jsonify({'error': "'min_risk' must be a non-negative number"}), 400
+
+    conn = None
+    try:
+        conn = get_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT r.product_id, p.barcode, p.name, p.qty AS quantity_in_stock,
+                   r.avg_daily_demand, r.lead_time_demand, r.safety_stock,
+                   r.reorder_point, r.suggested_qty, r.stockout_risk, r.computed_at
+            FROM reorder_suggestions r
+            JOIN products p ON p.product_id = r.product_id
+            WHERE r.suggested_qty > 0 AND r.stockout_risk >= %s
+            ORDER BY r.stockout_risk DESC, r.suggested_qty DESC
+            LIMIT %s
+        """, (min_risk, limit))
+        suggestions = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        return jsonify({'suggestions': suggestions})
+
+    except Exception as err:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(err)}), 500
@@ -0,0 +1,106 @@
+# routes/stores.py
+from flask import Blueprint, request, jsonify
+from db import get_connection, get_store_connection, STORE_SHARDS
+from validators import STORE_STOCK_ITEM_SCHEMA
+
+stores_bp = Blueprint('stores', __name__)
+
+@stores_bp.route('/stores', methods=['GET'])
+def get_stores():
+    """All stores, with the shard each one lives on"""
+    conn = None
+    try:
+        conn = get_connection(read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT store_id, name, address, created_at FROM stores ORDER BY name")
+        stores = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        for store in stores:
+            shard = STORE_SHARDS.get(store['store_id'])
+            store['shard'] = f"{shard['host']}:{shard['port']}/{shard['database']}" if shard else 'primary'
+        return jsonify({'stores': stores})
+
+    except Exception as err:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(err)}), 500
+
+@stores_bp.route('/stores/<int:store_id>/stock', methods=['GET'])
+def get_store_stock(store_id):
+    """A store's stock levels, read from its shard"""
+    conn = None
+    try:
+        conn = get_store_connection(store_id, read_only=True)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT product_id, qty, updated_at
+            FROM store_stock
+            WHERE store_id = %s
+            ORDER BY product_id
+        """, (store_id,))
+        stock = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        return jsonify({'store_id': store_id, 'stock': stock})
+
+    except Exception as err:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(err)}), 500
+
+@stores_bp.route('/stores/<int:store_id>/stock', methods=['PUT'])
+def set_store_stock(store_id):
+    """Set stock levels of a store: [{"product_id": 1, "qty": 10}, ...]"""
+    conn = None
+    try:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Request body must be a non-empty list of {product_id, qty}'}), 400
+        items, errors = STORE_STOCK_ITEM_SCHEMA.load_many(items)
+        if errors:
+            flat = {f"[{index}].{key}": error
+                    for index, item_errors in errors.items()
+                    for key, error in item_errors.items()}
+            return jsonify({'error': '; '.join(flat.values()), 'errors': flat}), 400
+
+        # Shards have no foreign key to the catalog on the primary: check it here
+        unknown = _unknown_products({item['product_id'] for item in items})
+        if unknown:
+            return jsonify({'error': f'Unknown product_id(s): {unknown}', 'unknown_products': unknown}), 400
+
+        # One multi-row upsert on the store's shard
+        conn = get_store_connection(store_id)
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO store_stock (store_id, product_id, qty)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE qty = VALUES(qty)
+        """, [(store_id, item['product_id'], item['qty']) for item in items])
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+        return jsonify({'status': 'success', 'updated': len(items)})
+
+    except Exception as err:
+        if conn:
+            conn.rollback()
+            conn.close()
+        return jsonify({'error': str(err)}), 400
+
+def _unknown_products(product_ids):
+    """The given product ids that are not in the catalog, sorted"""
+    conn = get_connection(read_only=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT product_id FROM products WHERE product_id IN ({', '.join(['%s'] * len(product_ids))})",
+            list(product_ids))
+        known = {row[0] for row in cursor.fetchall()}
+        cursor.close()
+    finally:
+        conn.close()
+    return sorted(product_ids - known)
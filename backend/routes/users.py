@@ -1,17 +1,20 @@
 # backend/routes/users.py
 from flask import Blueprint, request, jsonify
 from db import get_connection
+from validators import USER_SCHEMA, USER_UPDATE_SCHEMA
+from response_cache import response_cache
 import mysql.connector
 import bcrypt
 
 users_bp = Blueprint('users', __name__)
 
 @users_bp.route('/users', methods=['GET'])
+@response_cache.cached(lambda: ['user-list'])
 def get_users():
     """Get all users with filtering and pagination"""
     conn = None
     try:
-        conn = get_connection()
+        conn = get_connection(read_only=True)
         cursor = conn.cursor(dictionary=True)
         
         # Get query parameters
@@ -99,11 +102,12 @@ def get_users():
         return jsonify({'error': str(err)}), 500
 
 @users_bp.route('/users/<int:user_id>', methods=['GET'])
+@response_cache.cached(lambda user_id: [f'user:{user_id}'])
 def get_user(user_id):
     """Get a specific user by ID"""
     conn = None
     try:
-        conn = get_connection()
+        conn = get_connection(read_only=True)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("""
@@ -147,13 +151,12 @@ def create_user():
     """Create a new user with all attributes"""
     conn = None
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
-        # Validate required fields
-        required_fields = ['username', 'full_name', 'phone_number', 'email', 'password', 'role']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'{field} is required'}), 400
+        # Validate payload (values come back coerced)
+        data, errors = USER_SCHEMA.load(data)
+        if errors:
+            return jsonify({'error': '; '.join(errors.values()), 'errors': errors}), 400
         
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
@@ -198,23 +201,30 @@ def create_user():
         cursor.close()
         conn.close()
         
-        return jsonify({
-            'message': 'User created successfully',
-            'user_id': user_id
-        }), 201
-        
     except Exception as err:
         if conn:
             conn.rollback()
             conn.close()
         return jsonify({'error': str(err)}), 500
 
+    # Committed: nothing after this point may report the write as failed
+    response_cache.invalidate('user-list')
+    return jsonify({
+        'message': 'User created successfully',
+        'user_id': user_id
+    }), 201
+
 @users_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
     """Update an existing user with all attributes"""
     conn = None
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        
+        # Validate payload (values come back coerced)
+        data, errors = USER_UPDATE_SCHEMA.load(data, partial=True)
+        if errors:
+            return jsonify({'error': '; '.join(errors.values()), 'errors': errors}), 400
         
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
@@ -261,14 +271,16 @@ def update_user(user_id):
         cursor.close()
         conn.close()
         
-        return jsonify({'message': 'User updated successfully'})
-        
     except Exception as err:
         if conn:
             conn.rollback()
             conn.close()
         return jsonify({'error': str(err)}), 500
 
+    # Committed: nothing after this point may report the write as failed
+    response_cache.invalidate(f'user:{user_id}', 'user-list')
+    return jsonify({'message': 'User updated successfully'})
+
 @users_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     """Delete a user"""
@@ -289,14 +301,16 @@ def delete_user(user_id):
         cursor.close()
         conn.close()
         
-        return jsonify({'message': 'User deleted successfully'})
-        
     except Exception as err:
         if conn:
             conn.rollback()
             conn.close()
         return jsonify({'error': str(err)}), 500
 
+    # Committed: nothing after this point may report the write as failed
+    response_cache.invalidate(f'user:{user_id}', 'user-list')
+    return jsonify({'message': 'User deleted successfully'})
+
 def _get_default_permissions(role):
     """Get default permissions based on role"""
     permissions = {
@@ -0,0 +1,349 @@
+# scheduler.py
+# Background jobs backed by the `jobs` table. Cron schedules enqueue jobs,
+# workers (worker.py) claim them one at a time under a MySQL named lock so a
+# job is only ever claimed once and per-type concurrency limits hold across
+# every worker process.
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from db import get_connection
+
+log = logging.getLogger(__name__)
+
+# Seconds between polls for due jobs
+POLL_INTERVAL = 1
+# Seconds to wait for the claim lock before giving up on this poll
+CLAIM_LOCK_TIMEOUT = 5
+# First retry delay in seconds, doubled on every further attempt
+RETRY_BACKOFF = 30
+# A running job whose worker has not sent a heartbeat for this many seconds
+# is considered lost (the worker died) and failed
+LOST_AFTER = 60
+
+JOB_TYPES = {}
+
+
+class JobType:
+    """
+    params is the Schema of the payload handler accepts (None: no payload).
+    timeout only reports a job as overdue: a running job keeps its
+    concurrency slot until its thread ends.
+    """
+    def __init__(self, name, handler, schedule=None, max_concurrency=1,
+                 max_attempts=3, timeout=3600, params=None):
+        self.name = name
+        self.handler = handler
+        self.schedule = CronSchedule(schedule) if schedule else None
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.params = params
+
+    def load_payload(self, payload):
+        """
+        Return (payload with coerced values, {field: error}); errors is empty
+        when handler accepts the payload.
+        """
+        if payload is None:
+            return {}, {}
+        if not isinstance(payload, dict):
+            return None, {"payload": "'payload' must be a JSON object"}
+        allowed = self.params.fields if self.params else {}
+        errors = {name: f"'{name}' is not a parameter of {self.name}"
+                  for name in payload if name not in allowed}
+        if self.params:
+            payload, param_errors = self.params.load(payload)
+            errors.update(param_errors)
+        return payload, errors
+
+
+def register(name, handler, **options):
+    """Register a job handler; handler(**payload) runs in a worker"""
+    JOB_TYPES[name] = JobType(name, handler, **options)
+    return JOB_TYPES[name]
+
+
+class CronSchedule:
+    """
+    Five-field cron expression: minute hour day-of-month month day-of-week.
+    Fields accept *, n, a-b, */n, a-b/n, a/n (a to the end of the range)
+    and comma separated lists. Day-of-week runs 0-6 from Sunday.
+    As in cron, when both day-of-month and day-of-week are restricted (neither
+    starts with *), a day matches if either one does.
+    """
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.day_or_weekday = not fields[2].startswith("*") and not fields[4].startswith("*")
+        (self.minutes, self.hours, self.days,
+         self.months, self.weekdays) = [
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.RANGES)
+        ]
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for part in field.split(","):
+            spec, _, step = part.partition("/")
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = map(int, spec.split("-"))
+            else:
+                start = int(spec)
+                end = high if step else start
+            if not low <= start <= end <= high:
+                raise ValueError(f"cron field {field!r} out of range {low}-{high}")
+            step = int(step) if step else 1
+            if step < 1:
+                raise ValueError(f"cron field {field!r} has a step below 1")
+            values.update(range(start, end + 1, step))
+        return sorted(values)
+
+    def next_after(self, moment):
+        """First matching minute strictly after moment"""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = moment.replace(hour=0, minute=0)
+        for _ in range(366 * 4):
+            if day.month in self.months and self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= moment:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"cron expression never matches: {self.expression!r}")
+
+    def _day_matches(self, day):
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.day_or_weekday:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+
+def enqueue(job_type, payload=None, run_at=None, schedule_key=None, conn=None):
+    """
+    Add a job to the queue. Jobs with a schedule_key that is already queued
+    are ignored, so several workers can schedule the same cron run.
+    Returns the new job_id, or None when it was a duplicate.
+    """
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"unknown job type: {job_type}")
+    payload, errors = JOB_TYPES[job_type].load_payload(payload)
+    if errors:
+        raise ValueError(f"invalid payload for {job_type}: " + "; ".join(errors.values()))
+    own_conn = conn is None
+    conn = conn or get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT IGNORE INTO jobs (job_type, payload, run_at, schedule_key, max_attempts)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (job_type, json.dumps(payload or {}), run_at or datetime.now(),
+              schedule_key, JOB_TYPES[job_type].max_attempts))
+        job_id = cursor.lastrowid if cursor.rowcount else None
+        conn.commit()
+        cursor.close()
+        return job_id
+    finally:
+        if own_conn:
+            conn.close()
+
+
+class Worker:
+    """Polls the jobs table and runs claimed jobs on a thread pool"""
+
+    def __init__(self, threads=4):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        self._running = {}       # job_id -> (job, started_at monotonic)
+        self._overdue = set()
+        self._next_runs = {}
+
+    def run_forever(self):
+        log.info("worker %s started with %d threads", self.name, self.threads)
+        now = datetime.now()
+        self._next_runs = {
+            job.name: job.schedule.next_after(now)
+            for job in JOB_TYPES.values() if job.schedule
+        }
+        while True:
+            try:
+                self.schedule_due()
+                self.heartbeat()
+                self.expire_lost()
+                while self._free_slots() and self.claim_and_submit():
+                    pass
+            except Exception:
+                log.exception("worker poll failed")
+            time.sleep(POLL_INTERVAL)
+
+    def _free_slots(self):
+        with self._busy_lock:
+            return self._busy < self.threads
+
+    def schedule_due(self):
+        """Enqueue cron runs whose time has come"""
+        now = datetime.now()
+        for name, run_at in self._next_runs.items():
+            if run_at <= now:
+                enqueue(name, run_at=run_at, schedule_key=f"{name}@{run_at:%Y-%m-%dT%H:%M}")
+                self._next_runs[name] = JOB_TYPES[name].schedule.next_after(now)
+
+    def heartbeat(self):
+        """Mark this worker's running jobs as alive, and log the overdue ones"""
+        with self._busy_lock:
+            running = dict(self._running)
+        if not running:
+            return
+        for job_id, (job, started_at) in running.items():
+            job_type = JOB_TYPES[job["job_type"]]
+            if job_id not in self._overdue and time.monotonic() - started_at > job_type.timeout:
+                self._overdue.add(job_id)
+                log.warning("job %s (%s) still running after its %ss timeout",
+                            job_id, job_type.name, job_type.timeout)
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE jobs SET heartbeat_at = NOW()
+                WHERE job_id IN ({', '.join(['%s'] * len(running))})
+                  AND status = 'running' AND claimed_by = %s
+            """, [*running, self.name])
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def expire_lost(self):
+        """Fail running jobs whose worker stopped sending heartbeats (it died); they are not re-run"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE jobs SET status = 'failed', finished_at = NOW(),
+                       last_error = 'worker lost'
+                WHERE status = 'running'
+                  AND COALESCE(heartbeat_at, started_at) < NOW() - INTERVAL %s SECOND
+            """, (LOST_AFTER,))
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def claim_and_submit(self):
+        job = self.claim()
+        if not job:
+            return False
+        with self._busy_lock:
+            self._busy += 1
+            self._running[job["job_id"]] = (job, time.monotonic())
+        self._executor.submit(self._run, job)
+        return True
+
+    def claim(self):
+        """
+        Atomically move the oldest due job of a type that is under its
+        concurrency limit from queued to running. Returns the job row or None.
+        """
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT GET_LOCK('jobs_claim', %s) AS locked", (CLAIM_LOCK_TIMEOUT,))
+            if not cursor.fetchone()["locked"]:
+                return None
+            try:
+                cursor.execute("""
+                    SELECT job_type, COUNT(*) AS running FROM jobs
+                    WHERE status = 'running' GROUP BY job_type
+                """)
+                running = {row["job_type"]: row["running"] for row in cursor.fetchall()}
+                available = [
+                    job.name for job in JOB_TYPES.values()
+                    if running.get(job.name, 0) < job.max_concurrency
+                ]
+                if not available:
+                    return None
+
+                cursor.execute(f"""
+                    SELECT * FROM jobs
+                    WHERE status = 'queued' AND run_at <= NOW()
+                      AND job_type IN ({', '.join(['%s'] * len(available))})
+                    ORDER BY run_at, job_id
+                    LIMIT 1
+                """, available)
+                job = cursor.fetchone()
+                if not job:
+                    return None
+
+                cursor.execute("""
+                    UPDATE jobs SET status = 'running', claimed_by = %s,
+                           attempts = attempts + 1, started_at = NOW(), heartbeat_at = NOW(),
+                           finished_at = NULL, duration_ms = NULL
+                    WHERE job_id = %s AND status = 'queued'
+                """, (self.name, job["job_id"]))
+                claimed = cursor.rowcount == 1
+                conn.commit()
+                if not claimed:
+                    return None
+                job["attempts"] += 1
+                return job
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK('jobs_claim')")
+                cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _run(self, job):
+        started = time.monotonic()
+        error = None
+        try:
+            payload = json.loads(job["payload"]) if job["payload"] else {}
+            JOB_TYPES[job["job_type"]].handler(**payload)
+        except Exception as err:
+            log.exception("job %s (%s) failed", job["job_id"], job["job_type"])
+            error = str(err)
+        finally:
+            with self._busy_lock:
+                self._busy -= 1
+                del self._running[job["job_id"]]
+            self._overdue.discard(job["job_id"])
+        self._finish(job, int((time.monotonic() - started) * 1000), error)
+
+    def _finish(self, job, duration_ms, error):
+        if error is None:
+            status, run_at = "succeeded", None
+        elif job["attempts"] < job["max_attempts"]:
+            status = "queued"
+            run_at = datetime.now() + timedelta(seconds=RETRY_BACKOFF * 2 ** (job["attempts"] - 1))
+        else:
+            status, run_at = "failed", None
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE jobs SET status = %s, finished_at = NOW(), duration_ms = %s,
+                       last_error = %s, run_at = COALESCE(%s, run_at)
+                WHERE job_id = %s AND status = 'running' AND claimed_by = %s
+            """, (status, duration_ms, error, run_at, job["job_id"], self.name))
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
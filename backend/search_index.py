@@ -0,0 +1,507 @@
+# search_index.py
+# In-process index behind GET /pos/search. Matches name and category token
+# prefixes and barcode prefixes, allowing one typo, and ranks results by
+# recent sales. A background thread keeps it in step with product writes.
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from db import get_connection
+
+log = logging.getLogger(__name__)
+
+# Seconds between incremental syncs of changed and deleted products
+SYNC_INTERVAL = 2
+# Seconds between full rebuilds
+REBUILD_INTERVAL = 10 * 60
+# Seconds between re-sorts of the best-seller order
+RERANK_INTERVAL = 30
+# Products changed since the last re-sort are matched one by one; re-sort
+# early once there are this many
+RERANK_CHANGED = 256
+# Overlap on the updated_at watermark, covers replica lag and same-second writes
+SYNC_OVERLAP = timedelta(seconds=5)
+# Sales in this window count towards ranking
+SALES_WINDOW_DAYS = 30
+# Query terms shorter than this are not typo-corrected
+MIN_TYPO_LENGTH = 4
+# Prefixes matching at least this many products get a precomputed bitset;
+# rarer ones are read from the posting lists, which is at most this much work
+DENSE_PREFIX = 512
+
+_TOKEN = re.compile(r"\w+")
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def _tokenize(text):
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _prefix_end(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _set_bits(bits, positions):
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+
+
+class ProductSearchIndex:
+    """
+    Products are numbered by rank (best sellers first) when rerank() runs.
+    Every prefix of a name/category token or barcode that matches at least
+    DENSE_PREFIX products has a bitset over those rank positions, so a query
+    is an AND of a few bitsets and the lowest `limit` set bits are the best
+    matches; rarer prefixes are read from the posting lists. Products changed
+    since the last rerank() are left out of the bitsets and matched one by one.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._products = {}                 # id -> product dict
+        self._product_tokens = {}           # id -> set of indexed tokens
+        self._match_text = {}               # id -> " token token barcode", for prefix checks
+        self._sales = defaultdict(int)      # id -> units sold recently
+        self._id_sum = 0                    # sum and xor of the ids, see fingerprint()
+        self._id_xor = 0
+        # As of the last rerank(): in-stock ids by rank, the sorted tokens and
+        # barcodes (keys) with their rank positions, and the dense prefixes
+        self._ranked = []
+        self._keys = []
+        self._key_offsets = array("l", [0])  # positions of keys[k] are in
+        self._key_positions = array("l")     # _key_positions[_key_offsets[k]:_key_offsets[k + 1]]
+        self._dense = {}                     # prefix -> int bitset over rank positions
+        self._next_chars_cache = {}          # prefix -> characters following it in some key
+        self._changed = set()                # ids added, changed or removed since
+        self._changing = None                # ids changed while rerank() runs
+
+    def add(self, product):
+        """Insert or replace a product"""
+        with self._lock:
+            self.remove(product["id"])
+            product_id = product["id"]
+            tokens = set(_tokenize(product["name"])) | set(_tokenize(product.get("category")))
+            self._products[product_id] = product
+            self._product_tokens[product_id] = tokens
+            self._match_text[product_id] = " " + " ".join(
+                [*tokens, (product.get("barcode") or "").lower()])
+            self._id_sum += product_id
+            self._id_xor ^= product_id
+            self._mark_changed(product_id)
+
+    def remove(self, product_id):
+        with self._lock:
+            if self._products.pop(product_id, None) is None:
+                return
+            del self._product_tokens[product_id]
+            del self._match_text[product_id]
+            self._id_sum -= product_id
+            self._id_xor ^= product_id
+            self._mark_changed(product_id)
+
+    def _mark_changed(self, product_id):
+        self._changed.add(product_id)
+        if self._changing is not None:
+            self._changing.add(product_id)
+
+    def record_sale(self, items, deduct_stock=True):
+        """Count sold (product_id, quantity) pairs, and deduct them from catalog stock"""
+        with self._lock:
+            for product_id, quantity in items:
+                self._sales[product_id] += quantity
+                product = self._products.get(product_id)
+                if product and deduct_stock:
+                    product["quantity_in_stock"] -= quantity
+
+    def set_sales(self, sales):
+        with self._lock:
+            self._sales = defaultdict(int, sales)
+
+    def changed_count(self):
+        """Number of products matched one by one until the next rerank()"""
+        with self._lock:
+            return len(self._changed)
+
+    def rerank(self):
+        """
+        Re-number the in-stock products best sellers first and rebuild the
+        bitsets. Only the snapshot is taken under the lock.
+        """
+        with self._lock:
+            products = dict(self._products)
+            product_tokens = dict(self._product_tokens)
+            sales = dict(self._sales)
+            self._changing = set()
+
+        ranked = sorted(
+            (i for i, product in products.items() if product["quantity_in_stock"] > 0),
+            key=lambda i: (-sales.get(i, 0), len(products[i]["name"])))
+        positions = defaultdict(list)
+        for position, product_id in enumerate(ranked):
+            keys = product_tokens[product_id]
+            barcode = products[product_id].get("barcode")
+            if barcode:
+                keys = keys | {barcode.lower()}
+            for key in keys:
+                positions[key].append(position)
+        keys = sorted(positions)
+        offsets = array("l", [0])
+        flat = array("l")
+        for key in keys:
+            flat.extend(positions[key])
+            offsets.append(len(flat))
+        dense = {}
+        if len(flat) >= DENSE_PREFIX:
+            _build_dense(dense, "", keys, offsets, flat, 0, len(keys), (len(ranked) + 7) // 8)
+
+        with self._lock:
+            self._ranked = ranked
+            self._keys = keys
+            self._key_offsets = offsets
+            self._key_positions = flat
+            self._dense = dense
+            self._next_chars_cache = {}
+            self._changed, self._changing = self._changing, None
+
+    def product_ids(self):
+        with self._lock:
+            return set(self._products)
+
+    def fingerprint(self):
+        """(count, sum, xor) of the indexed ids, compared with the table by sync()"""
+        with self._lock:
+            return len(self._products), self._id_sum, self._id_xor
+
+    def search(self, query, limit=20):
+        """
+        Return up to `limit` in-stock products matching every term of query,
+        best sellers first. A term is a prefix of a name or category word or
+        of the barcode; a term of MIN_TYPO_LENGTH or more without matches
+        also matches prefixes one typo away ("chocl" finds "chocolate").
+        """
+        terms = _tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            matchers = []
+            match_sets = []
+            for term in terms:
+                matches = self._prefix_matches(term)
+                prefixes = None
+                if not matches and len(term) >= MIN_TYPO_LENGTH:
+                    prefixes = self._typo_prefixes(term)
+                    matches = self._typo_matches(prefixes)
+                matchers.append((term, prefixes))
+                match_sets.append(matches)
+            ranked = self._best(match_sets, limit) if all(match_sets) else []
+
+            # Products changed since the last rerank() are not in the bitsets
+            changed = [i for i in self._changed if self._matches(i, matchers)]
+            best = heapq.nsmallest(limit, ranked + changed, key=self._rank_key)
+            return [dict(self._products[i]) for i in best]
+
+    def _best(self, matches, limit):
+        """
+        The first `limit` usable products in the intersection of the match
+        sets (int bitsets or sorted position lists), in rank order.
+        """
+        bitsets = [m for m in matches if isinstance(m, int)]
+        lists = sorted((m for m in matches if not isinstance(m, int)), key=len)
+        bitset = None
+        if bitsets:
+            bitset = bitsets[0]
+            for other in bitsets[1:]:
+                bitset &= other
+            if not bitset:
+                return []
+
+        if lists:
+            # Walk the shortest list, checking the other sets per position
+            others = [set(other) for other in lists[1:]]
+            bits = bitset.to_bytes((len(self._ranked) + 7) // 8, "little") if bitset else None
+            positions = (
+                position for position in lists[0]
+                if all(position in other for other in others)
+                and (bits is None or bits[position >> 3] >> (position & 7) & 1)
+            )
+        else:
+            positions = _bit_positions(bitset.to_bytes((len(self._ranked) + 7) // 8, "little"))
+
+        best = []
+        for position in positions:
+            product_id = self._ranked[position]
+            if product_id in self._changed or self._products[product_id]["quantity_in_stock"] <= 0:
+                continue
+            best.append(product_id)
+            if len(best) == limit:
+                break
+        return best
+
+    def _prefix_matches(self, term):
+        """Bitset or sorted position list of the products with a key starting with term"""
+        bitset = self._dense.get(term)
+        if bitset is not None:
+            return bitset
+        keys = self._keys
+        lo = bisect.bisect_left(keys, term)
+        hi = bisect.bisect_left(keys, _prefix_end(term), lo)
+        # Not dense, so fewer than DENSE_PREFIX positions
+        return sorted(set(self._key_positions[self._key_offsets[lo]:self._key_offsets[hi]]))
+
+    def _typo_matches(self, prefixes):
+        """Union of the matches of the given key prefixes"""
+        bitset = 0
+        positions = set()
+        for prefix in prefixes:
+            matches = self._prefix_matches(prefix)
+            if isinstance(matches, int):
+                bitset |= matches
+            else:
+                positions.update(matches)
+        if not bitset:
+            return sorted(positions)
+        bits = bytearray(bitset.to_bytes((len(self._ranked) + 7) // 8, "little"))
+        _set_bits(bits, positions)
+        return int.from_bytes(bits, "little")
+
+    def _typo_prefixes(self, term):
+        """
+        Key prefixes (as of the last rerank()) one deletion, substitution or
+        insertion away from term.
+        """
+        found = set()
+        for i in range(len(term)):
+            candidate = term[:i] + term[i + 1:]
+            if self._has_prefix(candidate):
+                found.add(candidate)
+        # Only characters some key has after term[:i] can be substituted or inserted there
+        for i in range(len(term)):
+            head = term[:i]
+            for char in self._next_chars(head):
+                if char != term[i] and self._has_prefix(head + char + term[i + 1:]):
+                    found.add(head + char + term[i + 1:])
+                if self._has_prefix(head + char + term[i:]):
+                    found.add(head + char + term[i:])
+        return found
+
+    def _has_prefix(self, prefix):
+        keys = self._keys
+        i = bisect.bisect_left(keys, prefix)
+        return i < len(keys) and keys[i].startswith(prefix)
+
+    def _next_chars(self, head):
+        chars = self._next_chars_cache.get(head)
+        if chars is None:
+            chars = self._next_chars_cache[head] = self._find_next_chars(head)
+        return chars
+
+    def _find_next_chars(self, head):
+        keys = self._keys
+        lo = bisect.bisect_left(keys, head)
+        hi = bisect.bisect_left(keys, _prefix_end(head), lo) if head else len(keys)
+        chars = []
+        while lo < hi:
+            key = keys[lo]
+            if len(key) == len(head):
+                lo += 1
+                continue
+            chars.append(key[len(head)])
+            lo = bisect.bisect_left(keys, _prefix_end(head + key[len(head)]), lo, hi)
+        return chars
+
+    def _matches(self, product_id, matchers):
+        # Terms are \w+ and the text is space separated: a substring match
+        # on " term" is a prefix match on one of the tokens or the barcode
+        text = self._match_text.get(product_id)
+        if text is None or self._products[product_id]["quantity_in_stock"] <= 0:
+            return False
+        for term, typo_prefixes in matchers:
+            if " " + term in text:
+                continue
+            if not typo_prefixes or not any(" " + prefix in text for prefix in typo_prefixes):
+                return False
+        return True
+
+    def _rank_key(self, product_id):
+        return -self._sales.get(product_id, 0), len(self._products[product_id]["name"])
+
+
+def _build_dense(dense, prefix, keys, offsets, flat, lo, hi, size):
+    """
+    Store the bitset of prefix, whose keys are keys[lo:hi], and of every
+    dense prefix below it. Each position is set once, in the deepest dense
+    prefix above its key; parents OR their children's bitsets.
+    """
+    depth = len(prefix)
+    children = []
+    bits = None
+    i = lo
+    while i < hi:
+        key = keys[i]
+        if len(key) == depth:
+            j = i + 1
+        else:
+            child = prefix + key[depth]
+            j = bisect.bisect_left(keys, _prefix_end(child), i, hi)
+            if offsets[j] - offsets[i] >= DENSE_PREFIX:
+                children.append(_build_dense(dense, child, keys, offsets, flat, i, j, size))
+                i = j
+                continue
+        if bits is None:
+            bits = bytearray(size)
+        _set_bits(bits, flat[offsets[i]:offsets[j]])
+        i = j
+
+    if bits is None and len(children) == 1:
+        bitset = children[0]        # a chain like "c" > "ch" > "cho": share one bitset
+    else:
+        bitset = int.from_bytes(bits, "little") if bits is not None else 0
+        for child in children:
+            bitset |= child
+    if prefix:
+        dense[prefix] = bitset
+    return bitset
+
+
+def _bit_positions(bits):
+    """Set bit positions of a little-endian bitset, in increasing order"""
+    for match in _NONZERO.finditer(bits):
+        byte = match.start()
+        value = bits[byte]
+        while value:
+            low = value & -value
+            yield byte * 8 + low.bit_length() - 1
+            value ^= low
+
+
+_PRODUCTS_QUERY = """
+    SELECT product_id AS id, barcode, name, category, selling_price,
+           qty AS quantity_in_stock, updated_at
+    FROM products
+"""
+
+_index = None                   # None until the first rebuild() has finished
+_watermark = None
+_sync_lock = threading.Lock()
+_sync_thread = None
+
+
+def ready():
+    """False until the index has been built once"""
+    return _index is not None
+
+
+def search(query, limit=20):
+    """Search the index; None while it is still being built"""
+    index = _index
+    return index.search(query, limit) if index is not None else None
+
+
+def record_sale(items, deduct_stock=True):
+    index = _index
+    if index is not None:
+        index.record_sale(items, deduct_stock)
+
+
+def rebuild():
+    """Build a fresh index from products and recent sales, then swap it in"""
+    global _index, _watermark
+    index = ProductSearchIndex()
+    conn = get_connection(read_only=True)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(_PRODUCTS_QUERY)
+        watermark = None
+        for product in cursor:
+            watermark = _max_updated(watermark, product)
+            index.add(product)
+        cursor.execute("""
+            SELECT ti.product_id, SUM(ti.quantity) AS sold
+            FROM transaction_items ti
+            JOIN transactions t ON t.transaction_id = ti.transaction_id
+            WHERE t.transaction_date >= %s
+            GROUP BY ti.product_id
+        """, (datetime.now() - timedelta(days=SALES_WINDOW_DAYS),))
+        index.set_sales({row["product_id"]: int(row["sold"]) for row in cursor})
+        index.rerank()
+    finally:
+        cursor.close()
+        conn.close()
+    _index, _watermark = index, watermark
+
+
+def sync():
+    """Re-index products changed since the last sync, and drop deleted ones"""
+    global _watermark
+    if _index is None or _watermark is None:
+        return rebuild()
+    conn = get_connection(read_only=True)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(_PRODUCTS_QUERY + " WHERE updated_at >= %s",
+                       (_watermark - SYNC_OVERLAP,))
+        watermark = _watermark
+        for product in cursor:
+            watermark = _max_updated(watermark, product)
+            _index.add(product)
+        _watermark = watermark
+
+        # Deletes leave no updated_at behind: compare a fingerprint of the
+        # ids (count, sum, xor) and fetch the ids only when it differs, which
+        # also catches a delete and an insert landing in the same interval
+        cursor.execute("""
+            SELECT COUNT(*) AS products, COALESCE(SUM(product_id), 0) AS id_sum,
+                   COALESCE(BIT_XOR(product_id), 0) AS id_xor
+            FROM products
+        """)
+        row = cursor.fetchone()
+        if (row["products"], int(row["id_sum"]), int(row["id_xor"])) != _index.fingerprint():
+            cursor.execute("SELECT product_id FROM products")
+            for product_id in _index.product_ids() - {row["product_id"] for row in cursor}:
+                _index.remove(product_id)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def start_sync():
+    """Build the index and keep it up to date from a daemon thread (once per process)"""
+    global _sync_thread
+
+    def loop():
+        rebuilt_at = reranked_at = None
+        while True:
+            try:
+                if rebuilt_at is None or time.monotonic() - rebuilt_at > REBUILD_INTERVAL:
+                    rebuild()
+                    rebuilt_at = reranked_at = time.monotonic()
+                else:
+                    sync()
+                    if (time.monotonic() - reranked_at > RERANK_INTERVAL
+                            or _index.changed_count() > RERANK_CHANGED):
+                        _index.rerank()
+                        reranked_at = time.monotonic()
+            except Exception:
+                log.exception("search index sync failed")
+            time.sleep(SYNC_INTERVAL)
+
+    with _sync_lock:
+        if _sync_thread is None:
+            _sync_thread = threading.Thread(target=loop, name="search-index-sync", daemon=True)
+            _sync_thread.start()
+        return _sync_thread
+
+
+def _max_updated(watermark, product):
+    updated_at = product.pop("updated_at")
+    if watermark is None or (updated_at and updated_at > watermark):
+        return updated_at
+    return watermark
@@ -0,0 +1,18 @@
+# tasks.py
+# Background job types run by worker.py. Anything heavy belongs here rather
+# than in a request handler.
+import archive
+import forecast
+import kpi
+from stock_common.schema import Schema, Field
+from scheduler import register
+
+register("kpi_recompute", kpi.recompute, schedule="*/15 * * * *")
+register("reorder_forecast", forecast.run, schedule="0 2 * * *", timeout=2 * 3600)
+register("archive_transactions", archive.run, schedule="30 3 1 * *", timeout=6 * 3600,
+         params=Schema({
+             # At least the current month always stays in the hot table
+             'hot_months': Field('int', min_value=1),
+             'batch_size': Field('int', min_value=1),
+             'max_batches': Field('int', min_value=1),
+         }))
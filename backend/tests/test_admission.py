@@ -0,0 +1,123 @@
+import threading
+import time
+
+from flask import Flask
+
+from admission import AdmissionController, per_worker
+
+
+def controller(**options):
+    settings = dict(max_inflight=1, max_queue=4, max_queue_per_key=2, max_wait=2.0)
+    settings.update(options)
+    return AdmissionController(**settings)
+
+
+def wait_in_background(admission, key, results):
+    """acquire(key) on a thread; returns once the waiter is queued"""
+    queued = admission.metrics()["queue_depth"]
+    thread = threading.Thread(target=lambda: results.append((key, admission.acquire(key))))
+    thread.start()
+    deadline = time.monotonic() + 2
+    while admission.metrics()["queue_depth"] == queued and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return thread
+
+
+def test_admits_up_to_max_inflight_without_waiting():
+    admission = controller(max_inflight=2)
+    assert admission.acquire("till-1")
+    assert admission.acquire("till-2")
+    metrics = admission.metrics()
+    assert metrics["inflight"] == 2
+    assert metrics["admitted"] == 2
+    assert metrics["wait_ms"]["max"] == 0.0
+
+
+def test_rejects_when_a_terminal_queue_is_full():
+    admission = controller(max_wait=0.5)
+    assert admission.acquire("till-1")
+    results = []
+    threads = [wait_in_background(admission, "till-2", results) for _ in range(2)]
+    # Third waiter from the same till is over max_queue_per_key
+    assert not admission.acquire("till-2")
+    assert admission.metrics()["rejected"] == 1
+    admission.release(0.01)
+    admission.release(0.01)
+    for thread in threads:
+        thread.join()
+    assert [admitted for _, admitted in results] == [True, True]
+
+
+def test_rejects_when_the_queue_is_full():
+    admission = controller(max_queue=1, max_wait=0.5)
+    assert admission.acquire("till-1")
+    results = []
+    thread = wait_in_background(admission, "till-2", results)
+    assert not admission.acquire("till-3")
+    admission.release(0.01)
+    thread.join()
+    assert results == [("till-2", True)]
+
+
+def test_waiter_times_out():
+    admission = controller(max_wait=0.05)
+    assert admission.acquire("till-1")
+    assert not admission.acquire("till-2")
+    metrics = admission.metrics()
+    assert metrics["timed_out"] == 1
+    assert metrics["queue_depth"] == 0
+    assert metrics["queued_terminals"] == 0
+
+
+def test_release_serves_terminals_round_robin():
+    admission = controller(max_queue=8, max_queue_per_key=4)
+    assert admission.acquire("busy")
+    results = []
+    threads = [wait_in_background(admission, key, results)
+               for key in ["busy", "busy", "busy", "quiet"]]
+    for _ in threads:
+        admission.release(0.01)
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    # The quiet till is served second, not behind all of the busy till's waiters
+    assert [key for key, _ in results] == ["busy", "quiet", "busy", "busy"]
+    assert admission.metrics()["inflight"] == 1
+
+
+def test_retry_after_scales_with_backlog():
+    admission = controller(max_inflight=2)
+    assert admission.retry_after() == 1
+    admission.acquire("till-1")
+    admission.acquire("till-2")
+    admission.release(3.0)
+    admission.acquire("till-3")
+    # Two in flight at 3 s each over two slots
+    assert admission.retry_after() == 3
+
+
+def test_limit_decorator_returns_503_with_retry_after():
+    admission = controller(max_wait=0.01)
+    app = Flask(__name__)
+
+    @app.route("/checkout", methods=["POST"])
+    @admission.limit(lambda: "till-1")
+    def checkout():
+        return {"ok": True}
+
+    client = app.test_client()
+    assert client.post("/checkout").status_code == 200
+    assert admission.metrics()["inflight"] == 0
+
+    assert admission.acquire("other")
+    response = client.post("/checkout")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "error" in response.get_json()
+
+
+def test_per_worker_share_of_the_service_limit():
+    assert per_worker(8, 1) == 8
+    assert per_worker(8, 4) == 2
+    assert per_worker(8, 16) == 1
+    assert per_worker(8, 0) == 8
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+
+from scheduler import CronSchedule
+
+
+def test_parse_fields():
+    schedule = CronSchedule("*/15 8-10 1,15 * 1-5")
+    assert schedule.minutes == [0, 15, 30, 45]
+    assert schedule.hours == [8, 9, 10]
+    assert schedule.days == [1, 15]
+    assert schedule.months == list(range(1, 13))
+    assert schedule.weekdays == [1, 2, 3, 4, 5]
+
+
+def test_start_with_step_runs_to_the_end_of_the_range():
+    assert CronSchedule("5/10 * * * *").minutes == [5, 15, 25, 35, 45, 55]
+    assert CronSchedule("* 20/2 * * *").hours == [20, 22]
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *",
+                                        "* * 0 * *", "* * * 13 *", "* * * * 7",
+                                        "*/0 * * * *", "60/5 * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    # Strictly after: a moment on a matching minute moves to the next one
+    ("*/15 * * * *", datetime(2026, 10, 19, 9, 15), datetime(2026, 10, 19, 9, 30)),
+    ("*/15 * * * *", datetime(2026, 10, 19, 9, 14, 59), datetime(2026, 10, 19, 9, 15)),
+    ("30 2 * * *", datetime(2026, 10, 19, 3, 0), datetime(2026, 10, 20, 2, 30)),
+    ("0 0 1 * *", datetime(2026, 12, 15), datetime(2027, 1, 1)),
+    # 2026-10-19 is a Monday; day-of-week 0 is Sunday
+    ("0 9 * * 0", datetime(2026, 10, 19, 12, 0), datetime(2026, 10, 25, 9, 0)),
+    ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29)),
+    ("5/10 * * * *", datetime(2026, 10, 19, 9, 5), datetime(2026, 10, 19, 9, 15)),
+    # Day-of-month and day-of-week both restricted: either one matches
+    ("0 0 13 * 5", datetime(2026, 10, 19), datetime(2026, 10, 23)),
+    ("0 0 13 * 5", datetime(2026, 11, 7), datetime(2026, 11, 13)),
+    # Only one restricted: that one decides
+    ("0 0 13 * *", datetime(2026, 10, 19), datetime(2026, 11, 13)),
+    ("0 0 */2 * 5", datetime(2026, 10, 19), datetime(2026, 10, 23)),
+    ("0 0 * * 5", datetime(2026, 10, 19), datetime(2026, 10, 23)),
+])
+def test_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+def test_never_matches():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(datetime(2026, 1, 1))
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+import search_index
+from search_index import ProductSearchIndex
+
+WORDS = ["milk", "mild", "cheese", "cheddar", "chocolate", "choc", "bread",
+         "butter", "banana", "bean", "apple", "juice", "water", "dairy", "frozen"]
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    # A low threshold so the small catalog exercises both bitsets and lists
+    monkeypatch.setattr(search_index, "DENSE_PREFIX", 16)
+    rng = random.Random(7)
+    products = [
+        {
+            "id": product_id,
+            "barcode": f"{rng.choice(['600', '601', '7'])}{rng.randrange(10 ** 6):06d}",
+            "name": " ".join(rng.sample(WORDS, 2)) + f" {rng.choice([1, 2, 500])}",
+            "category": rng.choice(["Dairy", "Bakery", "Snacks"]),
+            "selling_price": 1.0,
+            "quantity_in_stock": rng.choice([0, 1, 5, 10]),
+        }
+        for product_id in range(1, 2001)
+    ]
+    index = ProductSearchIndex()
+    for product in products:
+        index.add(product)
+    index.set_sales({p["id"]: rng.randint(0, 100) for p in products if rng.random() < 0.5})
+    index.rerank()
+    return index, {p["id"]: p for p in products}
+
+
+def expected(index, products, query, limit=20):
+    """Brute force: every term is a prefix of a token or of the barcode"""
+    terms = search_index._tokenize(query)
+    found = []
+    for product_id, product in products.items():
+        keys = search_index._tokenize(product["name"]) + search_index._tokenize(product["category"])
+        keys.append(product["barcode"].lower())
+        if product["quantity_in_stock"] > 0 and all(
+                any(key.startswith(term) for key in keys) for term in terms):
+            found.append(product_id)
+    return sorted(index._rank_key(i) for i in found)[:limit]
+
+
+QUERIES = ["m", "mi", "milk", "ch", "choc", "chocolate", "d", "dairy milk",
+           "b b", "600", "6001", "7", "milk 5", "c 1", "banana apple juice", "zzz"]
+
+
+def ranks(index, results):
+    return sorted(index._rank_key(product["id"]) for product in results)
+
+
+def test_matches_brute_force(catalog):
+    index, products = catalog
+    for query in QUERIES:
+        assert ranks(index, index.search(query)) == expected(index, products, query), query
+
+
+def test_matches_brute_force_after_changes(catalog):
+    index, products = catalog
+    rng = random.Random(3)
+    for product_id in rng.sample(sorted(products), 50):
+        products[product_id] = dict(products[product_id], name="fresh milk", quantity_in_stock=3)
+        index.add(products[product_id])
+    for product_id in rng.sample(sorted(products), 50):
+        del products[product_id]
+        index.remove(product_id)
+    sold = rng.sample(sorted(products), 50)
+    index.record_sale([(product_id, 1000) for product_id in sold])
+    for product_id in sold:
+        products[product_id]["quantity_in_stock"] = index._products[product_id]["quantity_in_stock"]
+
+    for query in QUERIES + ["fresh", "fresh milk"]:
+        assert ranks(index, index.search(query)) == expected(index, products, query), query
+
+    index.rerank()
+    for query in QUERIES + ["fresh", "fresh milk"]:
+        assert ranks(index, index.search(query)) == expected(index, products, query), query
+
+
+def test_results_are_ranked_best_sellers_first(catalog):
+    index, _ = catalog
+    results = index.search("m", limit=50)
+    keys = [index._rank_key(product["id"]) for product in results]
+    assert keys == sorted(keys)
+
+
+def test_typo_in_a_whole_word():
+    index = ProductSearchIndex()
+    index.add({"id": 1, "barcode": "1", "name": "Cheddar Cheese", "category": "Dairy",
+               "selling_price": 1.0, "quantity_in_stock": 1})
+    index.rerank()
+    assert [p["id"] for p in index.search("chese")] == [1]
+    assert [p["id"] for p in index.search("dairu")] == [1]
+
+
+def test_typo_in_a_half_typed_word():
+    index = ProductSearchIndex()
+    index.add({"id": 1, "barcode": "1", "name": "Dark Chocolate", "category": "Snacks",
+               "selling_price": 1.0, "quantity_in_stock": 1})
+    index.add({"id": 2, "barcode": "2", "name": "Milk", "category": "Dairy",
+               "selling_price": 1.0, "quantity_in_stock": 1})
+    index.rerank()
+    assert [p["id"] for p in index.search("chocl")] == [1]
+    assert [p["id"] for p in index.search("xhoco")] == [1]
+    assert index.search("zzzz") == []
+
+
+def test_short_terms_are_not_typo_corrected():
+    index = ProductSearchIndex()
+    index.add({"id": 1, "barcode": "1", "name": "Milk", "category": "Dairy",
+               "selling_price": 1.0, "quantity_in_stock": 1})
+    index.rerank()
+    assert index.search("mlk") == []
+
+
+def test_out_of_stock_and_removed_products_are_not_returned(catalog):
+    index, products = catalog
+    product_id = index.search("milk", limit=1)[0]["id"]
+    index.record_sale([(product_id, products[product_id]["quantity_in_stock"])])
+    assert product_id not in [p["id"] for p in index.search("milk", limit=2000)]
+
+    other = index.search("milk", limit=1)[0]["id"]
+    index.remove(other)
+    assert other not in [p["id"] for p in index.search("milk", limit=2000)]
+
+
+def test_fingerprint_changes_when_a_delete_and_an_insert_cancel_out(catalog):
+    index, products = catalog
+    before = index.fingerprint()
+    index.remove(5)
+    index.add(dict(products[5], id=99999))
+    assert index.fingerprint()[0] == before[0]
+    assert index.fingerprint() != before
+
+
+def test_search_before_the_first_build(monkeypatch):
+    monkeypatch.setattr(search_index, "_index", None)
+    assert search_index.search("milk") is None
+    assert not search_index.ready()
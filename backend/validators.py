@@ -0,0 +1,40 @@
+# validators.py
+# Payload schemas for the users and POS routes (see schema.py)
+from stock_common.schema import Schema, Field
+
+PERMISSION_FIELDS = ['can_view_products', 'can_add_product', 'can_edit_product',
+                     'can_delete_product', 'can_view_activity_history', 'can_set_alerts']
+
+USER_SCHEMA = Schema({
+    'username': Field('string', required=True, max_length=50),
+    'full_name': Field('string', required=True, max_length=100),
+    'phone_number': Field('string', required=True, max_length=20),
+    'email': Field('email', required=True, max_length=100),
+    'password': Field('string', required=True),
+    'role': Field('string', required=True, max_length=20),
+    **{field: Field('bool') for field in PERMISSION_FIELDS},
+})
+
+USER_UPDATE_SCHEMA = Schema({
+    **{name: field for name, field in USER_SCHEMA.fields.items() if name != 'password'},
+    'reset_password': Field('bool'),
+    'new_password': Field('string', optional=True),
+})
+
+TRANSACTION_ITEM_SCHEMA = Schema({
+    'product_id': Field('int', required=True, min_value=1),
+    'quantity': Field('int', required=True, min_value=1),
+})
+
+POS_TRANSACTION_SCHEMA = Schema({
+    'worker_id': Field('int', required=True, min_value=1),
+    'total_amount': Field('number', required=True, min_value=0),
+    'payment_method': Field('string', required=True, max_length=20),
+    'store_id': Field('int', optional=True, min_value=1),
+    'items': Field('list', required=True, min_items=1, items=TRANSACTION_ITEM_SCHEMA),
+})
+
+STORE_STOCK_ITEM_SCHEMA = Schema({
+    'product_id': Field('int', required=True, min_value=1),
+    'qty': Field('int', required=True, min_value=0),
+})
@@ -0,0 +1,13 @@
+# worker.py
+# Background job worker. Run one or more alongside the API:
+#   python worker.py [threads]
+import logging
+import sys
+
+import tasks  # noqa: F401  (registers the job types)
+from scheduler import Worker
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    Worker(threads).run_forever()
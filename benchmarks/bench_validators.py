@@ -0,0 +1,134 @@
+"""
+Microbenchmark: compiled PRODUCT_SCHEMA against the previous hand-written
+product validator.
+
+Run from the repository root:
+    python -m benchmarks.bench_validators
+"""
+import timeit
+from datetime import datetime
+
+from utils.validators import PRODUCT_SCHEMA
+
+VALID = {
+    'barcode': '6001234567890',
+    'name': 'Whole Milk 1L',
+    'category': 'Dairy',
+    'quantity_in_stock': 24,
+    'unit': 'bottle',
+    'buying_price': 0.85,
+    'selling_price': 1.20,
+    'expiry_date': '2026-12-31',
+    'supplier': 'Fresh Farms',
+    'status': 'In stock',
+}
+
+INVALID = dict(VALID, buying_price='abc', expiry_date='31/12/2026', status='Unknown')
+
+def legacy_validate_product_data(data, is_update=False):
+    """
+    Validator as it was before stock_common.schema, kept for comparison.
+    Returns (is_valid, error_message)
+    """
+    errors = []
+
+    # Required fields for creation
+    if not is_update:
+        required_fields = ['barcode', 'name', 'category', 'buying_price', 'selling_price']
+        for field in required_fields:
+            if field not in data or not data[field]:
+                errors.append(f"'{field}' is required")
+
+    # Validate barcode
+    if 'barcode' in data:
+        if not isinstance(data['barcode'], str) or len(data['barcode']) > 50:
+            errors.append("'barcode' must be a string with max 50 characters")
+
+    # Validate name
+    if 'name' in data:
+        if not isinstance(data['name'], str) or len(data['name']) > 100:
+            errors.append("'name' must be a string with max 100 characters")
+
+    # Validate category
+    if 'category' in data:
+        if not isinstance(data['category'], str) or len(data['category']) > 50:
+            errors.append("'category' must be a string with max 50 characters")
+
+    # Validate quantity_in_stock
+    if 'quantity_in_stock' in data:
+        try:
+            qty = int(data['quantity_in_stock'])
+            if qty < 0:
+                errors.append("'quantity_in_stock' must be non-negative")
+        except (ValueError, TypeError):
+            errors.append("'quantity_in_stock' must be a valid integer")
+
+    # Validate unit
+    if 'unit' in data:
+        if not isinstance(data['unit'], str) or len(data['unit']) > 20:
+            errors.append("'unit' must be a string with max 20 characters")
+
+    # Validate buying_price
+    if 'buying_price' in data:
+        try:
+            price = float(data['buying_price'])
+            if price < 0:
+                errors.append("'buying_price' must be non-negative")
+        except (ValueError, TypeError):
+            errors.append("'buying_price' must be a valid number")
+
+    # Validate selling_price
+    if 'selling_price' in data:
+        try:
+            price = float(data['selling_price'])
+            if price < 0:
+                errors.append("'selling_price' must be non-negative")
+        except (ValueError, TypeError):
+            errors.append("'selling_price' must be a valid number")
+
+    # Validate expiry_date
+    if 'expiry_date' in data and data['expiry_date']:
+        try:
+            datetime.strptime(data['expiry_date'], '%Y-%m-%d')
+        except (ValueError, TypeError):
+            errors.append("'expiry_date' must be in YYYY-MM-DD format")
+
+    # Validate supplier
+    if 'supplier' in data and data['supplier']:
+        if not isinstance(data['supplier'], str) or len(data['supplier']) > 100:
+            errors.append("'supplier' must be a string with max 100 characters")
+
+    # Validate status
+    if 'status' in data:
+        valid_statuses = ['In stock', 'Low stock', 'Out of stock']
+        if data['status'] not in valid_statuses:
+            errors.append(f"'status' must be one of {valid_statuses}")
+
+    if errors:
+        return False, "; ".join(errors)
+
+    return True, None
+def best(stmt, number, repeat=5):
+    # Best of several runs, so a noisy neighbour doesn't decide the ratio
+    return min(timeit.repeat(stmt, number=number, repeat=repeat))
+
+def main(number=100000):
+    cases = [
+        ("valid payload", VALID),
+        ("invalid payload", INVALID),
+    ]
+    for label, payload in cases:
+        legacy = best(lambda: legacy_validate_product_data(payload), number)
+        compiled = best(lambda: PRODUCT_SCHEMA.validate(payload), number)
+        print(f"{label:16} legacy {legacy / number * 1e6:7.2f} us   "
+              f"compiled {compiled / number * 1e6:7.2f} us   "
+              f"speedup {legacy / compiled:4.1f}x")
+
+    batch = [VALID] * 1000
+    legacy = best(lambda: [legacy_validate_product_data(r) for r in batch], 100)
+    compiled = best(lambda: PRODUCT_SCHEMA.validate_many(batch), 100)
+    print(f"{'batch of 1000':16} legacy {legacy * 10:7.2f} ms   "
+          f"compiled {compiled * 10:7.2f} ms   speedup {legacy / compiled:4.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# Code shared by the products service (repository root) and the POS backend.
+# Installed with: pip install -e common   (or ../common from backend/)
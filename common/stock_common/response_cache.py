@@ -0,0 +1,310 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+from werkzeug.http import http_date, parse_date
+
+# Server-side cache of serialized GET responses.
+#
+#     @product_bp.route('/products/<int:product_id>')
+#     @response_cache.cached(lambda product_id: [f'product:{product_id}'])
+#     def get_product(product_id): ...
+#
+#     response_cache.invalidate(f'product:{product_id}', 'product-list')
+#
+# Entries are tagged; invalidate() drops every entry carrying one of the tags
+# and publishes the tags on a channel so other worker processes drop theirs.
+# Each service builds its instance with from_environment(bypass=...), passing
+# its db.is_sticky_request so clients that wrote recently neither read nor
+# fill the cache and always see their own writes.
+
+log = logging.getLogger(__name__)
+
+class FileInvalidationChannel:
+    """
+    Local stand-in for a pub/sub channel (e.g. Redis): invalidations are
+    appended as JSON lines to a shared file that every process tails.
+    Once the file grows past max_bytes the publisher swaps in an empty one;
+    readers that see a new file may have missed lines, so poll() tells
+    them to drop everything.
+    """
+    def __init__(self, path, max_bytes=1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._inode, self._offset = _file_state(path)
+
+    def publish(self, tags):
+        line = json.dumps({'pid': self._pid, 'tags': list(tags)}) + '\n'
+        while True:
+            with open(self.path, 'a', encoding='utf-8') as channel:
+                channel.write(line)
+                channel.flush()
+                inode = os.fstat(channel.fileno()).st_ino
+                size = channel.tell()
+            # Rotated while we wrote: readers may already be on the new file
+            if _file_state(self.path)[0] == inode:
+                break
+        if size > self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        # Swap in an empty file atomically; readers still on the old one
+        # drop everything when they notice the new inode
+        fd, new_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)),
+                                        prefix='.rotate-')
+        os.close(fd)
+        os.chmod(new_path, 0o644)
+        os.replace(new_path, self.path)
+
+    def poll(self):
+        """
+        Return the tags published by other processes since the last poll, or
+        None when the file was rotated or truncated and lines may be missed.
+        """
+        inode, size = _file_state(self.path)
+        if inode is None:
+            return []
+        with self._lock:
+            if inode == self._inode and size == self._offset:
+                return []
+            try:
+                channel = open(self.path, 'r', encoding='utf-8')
+            except OSError:
+                return []
+            with channel:
+                inode = os.fstat(channel.fileno()).st_ino
+                reset = inode != self._inode or size < self._offset
+                if reset:
+                    self._inode, self._offset = inode, 0
+                channel.seek(self._offset)
+                data = channel.read()
+            # Leave a partially written last line for the next poll
+            complete = data[:data.rfind('\n') + 1]
+            self._offset += len(complete.encode('utf-8'))
+        if reset:
+            return None
+
+        tags = []
+        for line in complete.splitlines():
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get('pid') != self._pid:
+                tags.extend(message.get('tags', []))
+        return tags
+
+def _file_state(path):
+    """(inode, size) of path, (None, 0) when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, 0
+    return stat.st_ino, stat.st_size
+
+class _Entry:
+    __slots__ = ('body', 'status', 'mimetype', 'etag', 'last_modified', 'tags', 'expires')
+
+    def __init__(self, body, status, mimetype, etag, last_modified, tags, expires):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self.tags = tags
+        self.expires = expires
+
+class ResponseCache:
+    """
+    LRU of response bodies bounded by total size. ttl bounds how long an
+    entry can outlive a missed invalidation (e.g. a fill read from a lagging
+    replica just after a write). Requests for which bypass() is true go
+    straight to the view and are not stored.
+    """
+    def __init__(self, max_bytes, max_entry_bytes=None, ttl=60, channel=None, bypass=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self.channel = channel
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()       # key -> _Entry, least recently used first
+        self._by_tag = {}                   # tag -> set of keys
+        self._bytes = 0
+        self._generation = 0
+        self._cleared_generation = 0        # generation of the last clear()
+        self._tag_generation = {}           # tag -> generation of its last invalidation
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'not_modified': 0,
+                       'evictions': 0, 'invalidations': 0}
+
+    def cached(self, tags):
+        """
+        Decorator for GET views. tags(**view_args) returns the tags of the
+        response; the list/detail tags decide which writes invalidate it.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.bypass and self.bypass():
+                    with self._lock:
+                        self._stats['bypassed'] += 1
+                    return view(*args, **kwargs)
+
+                self._apply_remote_invalidations()
+                key = _request_key()
+
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry and entry.expires < time.monotonic():
+                        self._remove(key)
+                        entry = None
+                    if entry:
+                        self._entries.move_to_end(key)
+                        self._stats['hits'] += 1
+                    else:
+                        self._stats['misses'] += 1
+                        generation = self._generation
+                if entry:
+                    return self._respond(entry)
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    entry = self._store(key, response, tags(*args, **kwargs), generation)
+                    if entry:
+                        return self._respond(entry)
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        """
+        Drop every entry tagged with any of tags, here and in other processes.
+        Called after a commit, so a failed publish is logged, not raised.
+        """
+        self._drop(tags)
+        if self.channel:
+            try:
+                self.channel.publish(tags)
+            except OSError:
+                log.exception("could not publish cache invalidation of %s", tags)
+
+    def clear(self):
+        """
+        Drop every entry in this process.
+        """
+        with self._lock:
+            self._generation += 1
+            self._cleared_generation = self._generation
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._by_tag.clear()
+            self._tag_generation.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(self._stats,
+                        entries=len(self._entries),
+                        bytes=self._bytes,
+                        max_bytes=self.max_bytes,
+                        hit_ratio=round(self._stats['hits'] / lookups, 4) if lookups else 0.0)
+
+    def _apply_remote_invalidations(self):
+        if self.channel:
+            tags = self.channel.poll()
+            if tags is None:
+                self.clear()
+            elif tags:
+                self._drop(tags)
+
+    def _drop(self, tags):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._tag_generation[tag] = self._generation
+                for key in self._by_tag.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self._stats['invalidations'] += 1
+
+    def _store(self, key, response, tags, generation):
+        body = response.get_data()
+        if len(body) > self.max_entry_bytes:
+            return None
+        entry = _Entry(body, response.status_code, response.mimetype,
+                       hashlib.sha1(body).hexdigest(), int(time.time()), tuple(tags),
+                       time.monotonic() + self.ttl)
+        with self._lock:
+            # A write invalidated these tags while the view ran: the body may be stale
+            if (self._cleared_generation > generation or
+                    any(self._tag_generation.get(tag, 0) > generation for tag in entry.tags)):
+                return None
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def _respond(self, entry):
+        if_modified_since = parse_date(request.headers.get('If-Modified-Since'))
+        if (entry.etag in request.if_none_match or
+                (not request.if_none_match and if_modified_since
+                 and if_modified_since.timestamp() >= entry.last_modified)):
+            with self._lock:
+                self._stats['not_modified'] += 1
+            response = Response(status=304)
+        else:
+            response = Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+        response.set_etag(entry.etag)
+        response.headers['Last-Modified'] = http_date(entry.last_modified)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+def _request_key():
+    args = sorted(request.args.items(multi=True))
+    return request.path + ('?' + '&'.join(f'{k}={v}' for k, v in args) if args else '')
+
+def default_channel():
+    """
+    Shared invalidation channel for every worker on this host.
+    """
+    path = os.environ.get('RESPONSE_CACHE_CHANNEL',
+                          os.path.join(tempfile.gettempdir(), 'ssms-cache-invalidations.log'))
+    return FileInvalidationChannel(
+        path, max_bytes=int(os.environ.get('RESPONSE_CACHE_CHANNEL_MAX_BYTES', 1024 * 1024)))
+
+def from_environment(bypass=None):
+    """
+    Cache sized from RESPONSE_CACHE_* environment variables, on the default channel.
+    """
+    return ResponseCache(
+        max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+        ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 60)),
+        channel=default_channel(),
+        bypass=bypass,
+    )
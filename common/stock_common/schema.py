@@ -0,0 +1,264 @@
+import math
+import re
+from datetime import date
+
+# Declarative payload schemas, compiled once into validator functions.
+#
+#     PRODUCT = Schema({
+#         'name': Field('string', required=True, max_length=100),
+#         'buying_price': Field('number', min_value=0),
+#     })
+#     errors = PRODUCT.validate(data)                  # {} when valid
+#     errors = PRODUCT.validate(data, partial=True)    # updates: nothing required
+#     errors = PRODUCT.validate_many(records)          # {index: {field: error}}
+#     data, errors = PRODUCT.load(data)                # data with coerced values
+#
+# Handlers should use the values from load(): e.g. an 'int' field given as
+# "5" or 5.0 comes back as the int 5.
+
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}\Z')
+_EMAIL = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+\Z')
+_INT = re.compile(r'\s*[-+]?\d+\s*\Z')
+# Checked before float() so that rejecting a non-numeric string doesn't
+# cost a raised and caught ValueError
+_NUMBER = re.compile(r'\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*\Z')
+
+_MISSING = object()
+
+# Range of a MySQL INT column, the default bounds of 'int' fields
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+class Field:
+    """
+    One payload field.
+    type: 'string', 'int', 'number', 'bool', 'date' (YYYY-MM-DD), 'email' or 'list'.
+    optional=True skips the checks for empty values (None, '').
+    items is the Schema of each element of a 'list'.
+    """
+    def __init__(self, type, required=False, optional=False, max_length=None,
+                 min_value=None, max_value=None, choices=None, items=None, min_items=None):
+        self.type = type
+        self.required = required
+        self.optional = optional
+        self.max_length = max_length
+        self.min_value = min_value
+        self.max_value = max_value
+        self.choices = choices
+        self.items = items
+        self.min_items = min_items
+
+class Schema:
+    def __init__(self, fields):
+        self.fields = fields
+        compiled = [(name, field, _compile_field(name, field)) for name, field in fields.items()]
+        self._full = _compile_schema(compiled, partial=False)
+        self._partial = _compile_schema(compiled, partial=True)
+
+    def load(self, data, partial=False):
+        """
+        Validate one payload. Returns (data, errors): a copy of data with the
+        declared fields' values coerced, and {field: error message}, empty
+        when valid.
+        """
+        if not isinstance(data, dict):
+            return None, {'_': "Request body must be a JSON object"}
+        return (self._partial if partial else self._full)(data, dict(data))
+
+    def validate(self, data, partial=False):
+        """
+        Validate one payload. Returns {field: error message}, empty when valid.
+        """
+        if not isinstance(data, dict):
+            return {'_': "Request body must be a JSON object"}
+        # Nothing is returned but the errors, so the coerced copy isn't built
+        return (self._partial if partial else self._full)(data, None)[1]
+
+    def load_many(self, records, partial=False):
+        """
+        Validate a list of payloads. Returns (records, errors): the coerced
+        records, and {index: {field: error}} for the invalid ones only.
+        """
+        validate = self._partial if partial else self._full
+        loaded = []
+        errors = {}
+        for index, record in enumerate(records):
+            if isinstance(record, dict):
+                record, record_errors = validate(record, dict(record))
+            else:
+                record_errors = {'_': "must be a JSON object"}
+            loaded.append(record)
+            if record_errors:
+                errors[index] = record_errors
+        return loaded, errors
+
+    def validate_many(self, records, partial=False):
+        """
+        Validate a list of payloads. Returns {index: {field: error}} for the
+        invalid ones only, empty when every record is valid.
+        """
+        validate = self._partial if partial else self._full
+        errors = {}
+        for index, record in enumerate(records):
+            if isinstance(record, dict):
+                record_errors = validate(record, None)[1]
+            else:
+                record_errors = {'_': "must be a JSON object"}
+            if record_errors:
+                errors[index] = record_errors
+        return errors
+
+def _compile_schema(compiled, partial):
+    # required holds the field's "is required" message, or None
+    checks = [
+        (name, f"'{name}' is required" if field.required and not partial else None,
+         field.optional, check)
+        for name, field, check in compiled
+    ]
+
+    def validate(data, loaded):
+        # loaded is the copy that receives coerced values, or None when only
+        # the errors are wanted
+        errors = {}
+        for name, required, optional, check in checks:
+            value = data.get(name, _MISSING)
+            if value is _MISSING:
+                if required:
+                    errors[name] = required
+                continue
+            if required and (value is None or value == '' or value == []):
+                errors[name] = required
+                continue
+            if optional and (value is None or value == ''):
+                continue
+            value, error = check(value)
+            if error:
+                if isinstance(error, dict):
+                    errors.update(error)
+                else:
+                    errors[name] = error
+            elif loaded is not None:
+                loaded[name] = value
+        return loaded, errors
+
+    return validate
+
+def _compile_field(name, field):
+    """
+    Build a single check(value) -> (coerced value, error) for a field, with
+    every constant (choice sets, limits, messages) bound up front. error is
+    None when the value is valid.
+    """
+    kind = field.type
+
+    if kind == 'string' or kind == 'email':
+        max_length = field.max_length
+        message = f"'{name}' must be a string" + (f" with max {max_length} characters" if max_length else "")
+        email_message = f"'{name}' must be a valid email address"
+        def check(value):
+            if not isinstance(value, str) or (max_length and len(value) > max_length):
+                return None, message
+            if kind == 'email' and not _EMAIL.match(value):
+                return None, email_message
+            return value, None
+
+    elif kind == 'int' or kind == 'number':
+        min_value = field.min_value
+        max_value = field.max_value
+        if kind == 'int':
+            min_value = INT_MIN if min_value is None else min_value
+            max_value = INT_MAX if max_value is None else max_value
+        type_message = f"'{name}' must be a valid {'integer' if kind == 'int' else 'number'}"
+        min_message = (f"'{name}' must be non-negative" if min_value == 0
+                       else f"'{name}' must be at least {min_value}")
+        max_message = f"'{name}' must be at most {max_value}"
+
+        if kind == 'int':
+            def convert(value):
+                # Integral values only: 5, 5.0 and "5", not 1.5, "1.5" or "nan"
+                if isinstance(value, int):
+                    return value
+                if isinstance(value, float):
+                    return int(value) if value.is_integer() else None
+                if isinstance(value, str) and _INT.match(value):
+                    return int(value)
+                return None
+        else:
+            def convert(value):
+                if isinstance(value, (int, float)):
+                    number = float(value)
+                elif isinstance(value, str) and _NUMBER.match(value):
+                    number = float(value)
+                else:
+                    return None
+                return number if math.isfinite(number) else None
+
+        def check(value):
+            if isinstance(value, bool):
+                return None, type_message
+            number = convert(value)
+            if number is None:
+                return None, type_message
+            if min_value is not None and number < min_value:
+                return None, min_message
+            if max_value is not None and number > max_value:
+                return None, max_message
+            return number, None
+
+    elif kind == 'bool':
+        message = f"'{name}' must be true or false"
+        def check(value):
+            # 0 and 1 are accepted for clients that send MySQL-style flags
+            if isinstance(value, bool):
+                return value, None
+            if isinstance(value, int) and value in (0, 1):
+                return bool(value), None
+            return None, message
+
+    elif kind == 'date':
+        message = f"'{name}' must be in YYYY-MM-DD format"
+        def check(value):
+            if not isinstance(value, str) or not _DATE.match(value):
+                return None, message
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                return None, message
+            return value, None
+
+    elif kind == 'list':
+        items = field.items
+        min_items = field.min_items
+        message = f"'{name}' must be a list"
+        min_message = f"'{name}' must have at least {min_items} item(s)"
+        def check(value):
+            if not isinstance(value, list):
+                return None, message
+            if min_items and len(value) < min_items:
+                return None, min_message
+            if items:
+                value, nested = items.load_many(value)
+                if nested:
+                    return None, {
+                        f"{name}[{index}].{key}": error
+                        for index, item_errors in nested.items()
+                        for key, error in item_errors.items()
+                    }
+            return value, None
+
+    else:
+        raise ValueError(f"Unknown field type '{kind}' for '{name}'")
+
+    if field.choices is None:
+        return check
+
+    choices = frozenset(field.choices)
+    choices_message = f"'{name}' must be one of {list(field.choices)}"
+    def check_choice(value, check=check):
+        try:
+            if value not in choices:
+                return None, choices_message
+        except TypeError:
+            return None, choices_message
+        return check(value)
+    return check_choice
@@ -0,0 +1,103 @@
+import pytest
+
+from stock_common.schema import INT_MAX, Field, Schema
+
+PRODUCT = Schema({
+    'name': Field('string', required=True, max_length=10),
+    'quantity': Field('int', min_value=0),
+    'price': Field('number', required=True, min_value=0),
+    'expiry_date': Field('date', optional=True),
+    'status': Field('string', choices=['In stock', 'Out of stock']),
+    'active': Field('bool'),
+    'email': Field('email', optional=True),
+})
+
+ORDER = Schema({
+    'items': Field('list', required=True, min_items=1, items=Schema({
+        'product_id': Field('int', required=True, min_value=1),
+        'quantity': Field('int', required=True, min_value=1),
+    })),
+})
+
+VALID = {'name': 'Milk', 'quantity': 3, 'price': 1.5, 'status': 'In stock'}
+
+
+def test_valid_payload_has_no_errors():
+    assert PRODUCT.validate(VALID) == {}
+
+
+def test_required_fields():
+    errors = PRODUCT.validate({'name': '', 'quantity': 1})
+    assert errors == {'name': "'name' is required", 'price': "'price' is required"}
+
+
+def test_partial_skips_required():
+    assert PRODUCT.validate({'quantity': 2}, partial=True) == {}
+    assert PRODUCT.validate({'quantity': -1}, partial=True) == {
+        'quantity': "'quantity' must be non-negative"}
+
+
+def test_optional_fields_accept_empty_values():
+    assert PRODUCT.validate(dict(VALID, expiry_date=None, email='')) == {}
+
+
+@pytest.mark.parametrize('field, value, message', [
+    ('name', 'x' * 11, "'name' must be a string with max 10 characters"),
+    ('name', 5, "'name' must be a string with max 10 characters"),
+    ('quantity', 1.5, "'quantity' must be a valid integer"),
+    ('quantity', '1.5', "'quantity' must be a valid integer"),
+    ('quantity', True, "'quantity' must be a valid integer"),
+    ('quantity', INT_MAX + 1, f"'quantity' must be at most {INT_MAX}"),
+    ('price', 'abc', "'price' must be a valid number"),
+    ('price', 'nan', "'price' must be a valid number"),
+    ('price', float('inf'), "'price' must be a valid number"),
+    ('price', -1, "'price' must be non-negative"),
+    ('expiry_date', '31/12/2026', "'expiry_date' must be in YYYY-MM-DD format"),
+    ('expiry_date', '2026-02-30', "'expiry_date' must be in YYYY-MM-DD format"),
+    ('status', 'Unknown', "'status' must be one of ['In stock', 'Out of stock']"),
+    ('status', ['In stock'], "'status' must be one of ['In stock', 'Out of stock']"),
+    ('active', 2, "'active' must be true or false"),
+    ('email', 'not-an-email', "'email' must be a valid email address"),
+])
+def test_invalid_values(field, value, message):
+    assert PRODUCT.validate(dict(VALID, **{field: value})) == {field: message}
+
+
+def test_load_coerces_values_without_touching_the_input():
+    data = dict(VALID, quantity='5', price='2.50', active=1)
+    loaded, errors = PRODUCT.load(data)
+    assert errors == {}
+    assert loaded['quantity'] == 5 and isinstance(loaded['quantity'], int)
+    assert loaded['price'] == 2.5
+    assert loaded['active'] is True
+    assert data['quantity'] == '5'
+
+
+def test_non_object_body():
+    assert PRODUCT.load([VALID]) == (None, {'_': "Request body must be a JSON object"})
+    assert PRODUCT.validate('text') == {'_': "Request body must be a JSON object"}
+
+
+def test_nested_list_errors_are_flattened():
+    errors = ORDER.validate({'items': [{'product_id': 1, 'quantity': 2},
+                                       {'product_id': 0, 'quantity': 'x'}]})
+    assert errors == {
+        'items[1].product_id': "'product_id' must be at least 1",
+        'items[1].quantity': "'quantity' must be a valid integer",
+    }
+    assert ORDER.validate({'items': []}) == {'items': "'items' is required"}
+
+
+def test_many():
+    records = [VALID, dict(VALID, price=-1), 'text']
+    assert PRODUCT.validate_many(records) == {
+        1: {'price': "'price' must be non-negative"},
+        2: {'_': "must be a JSON object"},
+    }
+    loaded, errors = PRODUCT.load_many([dict(VALID, quantity='7')])
+    assert errors == {} and loaded[0]['quantity'] == 7
+
+
+def test_unknown_field_type():
+    with pytest.raises(ValueError):
+        Schema({'x': Field('decimal')})
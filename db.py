@@ -1,20 +1,65 @@
+import math
+import os
+import threading
+import time
+
 import mysql.connector
 from mysql.connector import Error
 
-def get_db_connection():
+# Primary (read/write) server
+PRIMARY = {
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASSWORD', ''),  # Change this to your MySQL password
+    'database': os.environ.get('DB_NAME', 'supermarket_db'),
+    'port': int(os.environ.get('DB_PORT', 3306)),
+}
+
+# Read replicas, e.g. DB_REPLICAS="127.0.0.1:3307,127.0.0.1:3308"
+REPLICAS = [
+    dict(PRIMARY, host=host, port=int(port or 3306))
+    for host, _, port in (
+        entry.strip().partition(':')
+        for entry in os.environ.get('DB_REPLICAS', '').split(',')
+        if entry.strip()
+    )
+]
+
+# After a write, the same client reads from the primary for this many seconds
+STICKY_SECONDS = float(os.environ.get('DB_STICKY_SECONDS', 5))
+# The time of a client's last write travels with the client, so stickiness
+# holds across worker processes and services: in this header, which the
+# frontend's ApiService sends back on every request (CORS exposes it), or in
+# this cookie for same-origin browser clients
+LAST_WRITE_COOKIE = 'db_last_write'
+LAST_WRITE_HEADER = 'X-Last-Write'
+# Replicas lagging more than this many seconds are taken out of rotation
+MAX_REPLICA_LAG = float(os.environ.get('DB_MAX_REPLICA_LAG', 2))
+# How often each replica's lag is re-checked, from a background thread
+LAG_CHECK_INTERVAL = float(os.environ.get('DB_LAG_CHECK_INTERVAL', 5))
+# Seconds a lag check may wait to connect to a replica
+LAG_CHECK_TIMEOUT = int(os.environ.get('DB_LAG_CHECK_TIMEOUT', 2))
+
+_lock = threading.Lock()
+_replica_health = {}     # replica index -> (checked_at, healthy)
+_next_replica = 0
+_lag_monitor = None
+
+def get_db_connection(read_only=False):
     """
     Create and return a database connection.
-    Returns None if connection fails.
+    Read-only callers are routed to a healthy replica unless the current
+    client wrote recently. Returns None if connection fails.
     """
+    if read_only and REPLICAS and not is_sticky_request():
+        connection = _replica_connection()
+        if connection:
+            return connection
+    elif not read_only:
+        _note_write()
+
     try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',  # Change this to your MySQL password
-            database='supermarket_db',
-            port=3306
-        )
-        return connection
+        return mysql.connector.connect(**PRIMARY)
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
@@ -24,4 +69,107 @@ def close_db_connection(connection):
     Close the database connection safely.
     """
     if connection and connection.is_connected():
-        connection.close()
\ No newline at end of file
+        connection.close()
+
+def is_sticky_request():
+    """
+    True when the client of the current request wrote within STICKY_SECONDS,
+    in this request or (per its cookie/header) in an earlier one.
+    """
+    from flask import g, has_request_context, request
+    if not has_request_context():
+        return False
+    if g.get('db_written_at'):
+        return True
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        written_at = float(value)
+    except (TypeError, ValueError):
+        return False
+    return 0 <= time.time() - written_at < STICKY_SECONDS
+
+def _note_write():
+    """
+    Hand the client the time of this write, once per request.
+    """
+    from flask import after_this_request, g, has_request_context
+    if not has_request_context() or g.get('db_written_at'):
+        return
+    g.db_written_at = written_at = f"{time.time():.3f}"
+
+    @after_this_request
+    def remember_write(response):
+        response.set_cookie(LAST_WRITE_COOKIE, written_at, max_age=math.ceil(STICKY_SECONDS),
+                            httponly=True, samesite='Lax')
+        response.headers[LAST_WRITE_HEADER] = written_at
+        return response
+
+def _replica_connection():
+    """
+    Round-robin over replicas, skipping unreachable or lagging ones.
+    """
+    global _next_replica
+    for _ in range(len(REPLICAS)):
+        with _lock:
+            index = _next_replica % len(REPLICAS)
+            _next_replica += 1
+        if not _replica_is_healthy(index):
+            continue
+        try:
+            return mysql.connector.connect(**REPLICAS[index])
+        except Error:
+            _mark_replica(index, False)
+    return None
+
+def _replica_is_healthy(index):
+    """
+    Health as last seen by the lag monitor. Requests never check lag
+    themselves; a replica with no recent check is skipped.
+    """
+    _start_lag_monitor()
+    checked = _replica_health.get(index)
+    return bool(checked and checked[1] and time.monotonic() - checked[0] < 3 * LAG_CHECK_INTERVAL)
+
+def _start_lag_monitor():
+    global _lag_monitor
+    if _lag_monitor is not None:
+        return
+    with _lock:
+        if _lag_monitor is None:
+            _lag_monitor = threading.Thread(target=_monitor_replica_lag, name='replica-lag-monitor',
+                                            daemon=True)
+            _lag_monitor.start()
+
+def _monitor_replica_lag():
+    while True:
+        for index in range(len(REPLICAS)):
+            _mark_replica(index, _check_replica_lag(index))
+        time.sleep(LAG_CHECK_INTERVAL)
+
+def _mark_replica(index, healthy):
+    _replica_health[index] = (time.monotonic(), healthy)
+    return healthy
+
+def _check_replica_lag(index):
+    """
+    A replica is healthy when replication runs and lag is under MAX_REPLICA_LAG.
+    """
+    connection = None
+    try:
+        connection = mysql.connector.connect(**REPLICAS[index], connection_timeout=LAG_CHECK_TIMEOUT)
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Error:
+            # MySQL < 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        status = cursor.fetchone()
+        cursor.close()
+        if not status:
+            return False
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return lag is not None and lag <= MAX_REPLICA_LAG
+    except Error:
+        return False
+    finally:
+        close_db_connection(connection)
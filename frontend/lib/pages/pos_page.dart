@@ -1,6 +1,7 @@
 import 'package:flutter/material.dart';
 import 'package:http/http.dart' as http;
 import 'dart:convert';
+import '../services/api_service.dart';
 import '../theme/app_theme.dart';
 import '../widgets/page_header.dart';
 import '../widgets/primary_button.dart';
@@ -155,7 +156,9 @@ class ApiPOSRepository implements POSRepository {
   @override
   Future<List<Product>> fetchProducts() async {
     try {
-      final response = await http.get(Uri.parse(productsUrl));
+      final response =
+          await http.get(Uri.parse(productsUrl), headers: ApiService.headers);
+      ApiService.noteResponse(response);
       if (response.statusCode == 200) {
         final data = json.decode(response.body);
         return (data['products'] as List)
@@ -362,7 +365,7 @@ class _POSPageState extends State<POSPage> {
     try {
       final response = await http.post(
         Uri.parse(ApiPOSRepository.transactionsUrl),
-        headers: {'Content-Type': 'application/json'},
+        headers: ApiService.headers,
         body: json.encode({
           'worker_id': 1,
           'total_amount': _state.total,
@@ -375,6 +378,7 @@ class _POSPageState extends State<POSPage> {
               .toList(),
         }),
       );
+      ApiService.noteResponse(response);
 
       if (response.statusCode == 201) {
         final data = json.decode(response.body);
@@ -6,19 +6,35 @@ class ApiService {
   // Change this to your backend URL if different
   static const String baseUrl = 'http://127.0.0.1:5000';
 
+  // Time of this client's last write, from the backend's X-Last-Write
+  // response header. Sent back with every request so that reads made right
+  // after a write (e.g. the product list after a checkout) are served by the
+  // primary database instead of a replica that may not have the write yet.
+  static String? _lastWrite;
+
   // Get headers for API requests
-  static Map<String, String> get _headers => {
+  static Map<String, String> get headers => {
         'Content-Type': 'application/json',
         'Accept': 'application/json',
+        if (_lastWrite != null) 'X-Last-Write': _lastWrite!,
       };
 
+  // Remember the last-write time a response carries, if any
+  static void noteResponse(http.Response response) {
+    final lastWrite = response.headers['x-last-write'];
+    if (lastWrite != null) {
+      _lastWrite = lastWrite;
+    }
+  }
+
   // GET /pos/products - Fetch available products
   static Future<List<Map<String, dynamic>>> getPosProducts() async {
     try {
       final response = await http.get(
         Uri.parse('$baseUrl/pos/products'),
-        headers: _headers,
+        headers: headers,
       );
+      noteResponse(response);
 
       if (response.statusCode == 200) {
         final data = json.decode(response.body);
@@ -41,7 +57,7 @@ class ApiService {
     try {
       final response = await http.post(
         Uri.parse('$baseUrl/pos/transactions'),
-        headers: _headers,
+        headers: headers,
         body: json.encode({
           'worker_id': workerId,
           'total_amount': totalAmount,
@@ -49,6 +65,7 @@ class ApiService {
           'items': items,
         }),
       );
+      noteResponse(response);
 
       if (response.statusCode == 201) {
         return json.decode(response.body);
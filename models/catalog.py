@@ -0,0 +1,110 @@
+import threading
+import time
+
+from db import get_db_connection, close_db_connection
+from mysql.connector import Error
+from models.inventory_kpi import InventoryKPI, CACHE_TTL
+
+# Normalized dimension tables: product field -> (table, id column)
+DIMENSIONS = {
+    'category': ('categories', 'category_id'),
+    'supplier': ('suppliers', 'supplier_id'),
+}
+
+class Catalog:
+    """
+    Category and supplier dimensions, and faceted product counts per dimension.
+    """
+    _lock = threading.Lock()
+    _names = {}             # field -> {id: name}
+    _loaded_at = {}
+
+    @staticmethod
+    def resolve_ids(cursor, data, before=None):
+        """
+        Look up (or create) the category_id / supplier_id for the category and
+        supplier names in data. before is the product row being updated, if
+        any: names it already has keep their id and are skipped. Returns a
+        dict of the id fields to write.
+        """
+        ids = {}
+        for field, (table, id_column) in DIMENSIONS.items():
+            if field not in data:
+                continue
+            name = data[field]
+            if not name:
+                ids[id_column] = None
+                continue
+            if before and before.get(field) == name and before.get(id_column) is not None:
+                continue
+            # Almost every name already exists: read it rather than taking a
+            # write lock on the dimension row for each product saved
+            cursor.execute(f"SELECT {id_column} FROM {table} WHERE name = %s", (name,))
+            row = cursor.fetchone()
+            if row:
+                ids[id_column] = row[id_column] if isinstance(row, dict) else row[0]
+                continue
+            # Another request may insert the same name first; the duplicate
+            # key then just returns its id
+            cursor.execute(
+                f"INSERT INTO {table} (name) VALUES (%s) "
+                f"ON DUPLICATE KEY UPDATE {id_column} = LAST_INSERT_ID({id_column})",
+                (name,))
+            ids[id_column] = cursor.lastrowid
+        return ids
+
+    @staticmethod
+    def get_facets(field):
+        """
+        Return every category or supplier with its product count and stock value.
+        Counts come from the incrementally maintained KPI summary.
+        Returns (success, result/error_message, status_code)
+        """
+        success, names, status_code = Catalog._get_names(field)
+        if not success:
+            return success, names, status_code
+
+        success, snapshot, status_code = InventoryKPI.get_snapshot()
+        if not success:
+            return success, snapshot, status_code
+
+        counts = snapshot[f'by_{field}']
+        id_column = DIMENSIONS[field][1]
+        facets = []
+        for dimension_id, name in names.items():
+            entry = counts.get(str(dimension_id), {})
+            facets.append({
+                id_column: dimension_id,
+                'name': name,
+                'product_count': entry.get('product_count', 0),
+                'stock_value': entry.get('stock_value', 0.0),
+            })
+        facets.sort(key=lambda facet: facet['name'])
+        return True, facets, 200
+
+    @staticmethod
+    def _get_names(field):
+        with Catalog._lock:
+            if field in Catalog._names and time.monotonic() - Catalog._loaded_at[field] < CACHE_TTL:
+                return True, Catalog._names[field], 200
+
+        table, id_column = DIMENSIONS[field]
+        connection = get_db_connection(read_only=True)
+        if not connection:
+            return False, "Database connection failed", 500
+
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT {id_column}, name FROM {table}")
+            names = dict(cursor.fetchall())
+            cursor.close()
+
+            with Catalog._lock:
+                Catalog._names[field] = names
+                Catalog._loaded_at[field] = time.monotonic()
+            return True, names, 200
+
+        except Error as e:
+            return False, f"Database error: {str(e)}", 500
+        finally:
+            close_db_connection(connection)
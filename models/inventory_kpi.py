@@ -0,0 +1,165 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from db import get_db_connection, close_db_connection
+from mysql.connector import Error
+
+# Seconds before the in-process snapshot is reloaded from the summary table,
+# which picks up deltas written by other processes (e.g. POS checkouts)
+CACHE_TTL = 5
+
+# Summary rows are split over counter slots that are summed on read, so
+# concurrent writers rarely share a row lock (see SLOTS in backend/kpi.py)
+SLOTS = 16
+
+class InventoryKPI:
+    """
+    Inventory valuation and product counts, kept in the inventory_kpis
+    summary table and changed by deltas instead of scanning products.
+    """
+    _lock = threading.Lock()
+    _rows = None            # (dimension, dim_key) -> [count, value, margin]
+    _snapshot = None
+    _loaded_at = 0.0
+
+    @staticmethod
+    def contributions(product):
+        """
+        Return the summary rows a single product adds to.
+        Returns [((dimension, dim_key), count, stock_value, potential_margin)]
+        """
+        qty = Decimal(product.get('qty') or 0)
+        buying_price = Decimal(str(product.get('buying_price') or 0))
+        selling_price = Decimal(str(product.get('selling_price') or 0))
+        value = qty * buying_price
+        margin = qty * (selling_price - buying_price)
+
+        # Categories and suppliers are keyed by id, matching the normalized tables
+        keys = [('total', 'all'),
+                ('status', product.get('status')),
+                ('category', _id_key(product.get('category_id'))),
+                ('supplier', _id_key(product.get('supplier_id')))]
+        return [(key, 1, value, margin) for key in keys if key[1]]
+
+    @staticmethod
+    def apply_deltas(cursor, changes):
+        """
+        Write the summary deltas for a list of (before, after) product rows,
+        where before is None for inserts and after is None for deletes.
+        Must run inside the same transaction as the product change.
+        Returns the aggregated deltas, to pass to note_deltas() after commit.
+        """
+        deltas = {}
+        for before, after in changes:
+            for row, sign in ((before, -1), (after, 1)):
+                if not row:
+                    continue
+                for key, count, value, margin in InventoryKPI.contributions(row):
+                    delta = deltas.setdefault(key, [0, Decimal(0), Decimal(0)])
+                    delta[0] += sign * count
+                    delta[1] += sign * value
+                    delta[2] += sign * margin
+
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if deltas:
+            # One random slot for all rows, written in key order: two writers
+            # either touch disjoint rows or lock the same rows in the same order
+            slot = random.randrange(SLOTS)
+            cursor.executemany("""
+                INSERT INTO inventory_kpis
+                (dimension, dim_key, slot, product_count, stock_value, potential_margin)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    product_count = product_count + VALUES(product_count),
+                    stock_value = stock_value + VALUES(stock_value),
+                    potential_margin = potential_margin + VALUES(potential_margin)
+            """, [(dimension, dim_key, slot, *delta) for (dimension, dim_key), delta in sorted(deltas.items())])
+        return deltas
+
+    @staticmethod
+    def note_deltas(deltas):
+        """
+        Apply committed deltas to the in-process cache.
+        """
+        with InventoryKPI._lock:
+            if InventoryKPI._rows is None:
+                return
+            for key, delta in deltas.items():
+                row = InventoryKPI._rows.setdefault(key, [0, Decimal(0), Decimal(0)])
+                for i in range(3):
+                    row[i] += delta[i]
+            InventoryKPI._snapshot = None
+
+    @staticmethod
+    def get_snapshot():
+        """
+        Return the current KPI snapshot from the in-process cache.
+        Returns (success, result/error_message, status_code)
+        """
+        with InventoryKPI._lock:
+            if InventoryKPI._rows is not None and time.monotonic() - InventoryKPI._loaded_at < CACHE_TTL:
+                if InventoryKPI._snapshot is None:
+                    InventoryKPI._snapshot = InventoryKPI._build_snapshot(InventoryKPI._rows)
+                return True, InventoryKPI._snapshot, 200
+
+        success, result, status_code = InventoryKPI._load_rows()
+        if not success:
+            return success, result, status_code
+
+        with InventoryKPI._lock:
+            InventoryKPI._rows = result
+            InventoryKPI._loaded_at = time.monotonic()
+            InventoryKPI._snapshot = InventoryKPI._build_snapshot(result)
+            return True, InventoryKPI._snapshot, 200
+
+    @staticmethod
+    def _load_rows():
+        connection = get_db_connection(read_only=True)
+        if not connection:
+            return False, "Database connection failed", 500
+
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT dimension, dim_key, SUM(product_count) AS product_count,
+                       SUM(stock_value) AS stock_value, SUM(potential_margin) AS potential_margin
+                FROM inventory_kpis
+                GROUP BY dimension, dim_key
+            """)
+            rows = {
+                (row['dimension'], row['dim_key']):
+                    [row['product_count'], row['stock_value'], row['potential_margin']]
+                for row in cursor.fetchall()
+            }
+            cursor.close()
+            return True, rows, 200
+
+        except Error as e:
+            return False, f"Database error: {str(e)}", 500
+        finally:
+            close_db_connection(connection)
+
+    @staticmethod
+    def _build_snapshot(rows):
+        snapshot = {
+            'total': {'product_count': 0, 'stock_value': 0.0, 'potential_margin': 0.0},
+            'by_status': {},
+            'by_category': {},
+            'by_supplier': {},
+        }
+        for (dimension, dim_key), (count, value, margin) in rows.items():
+            entry = {
+                'product_count': int(count),
+                'stock_value': float(value),
+                'potential_margin': float(margin),
+            }
+            if dimension == 'total':
+                snapshot['total'] = entry
+            elif count:
+                snapshot[f'by_{dimension}'][dim_key] = entry
+        return snapshot
+
+def _id_key(dimension_id):
+    return None if dimension_id is None else str(dimension_id)
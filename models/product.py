@@ -1,5 +1,8 @@
 from db import get_db_connection, close_db_connection
 from mysql.connector import Error
+from models.inventory_kpi import InventoryKPI
+from models.catalog import Catalog
+from utils.response_cache import response_cache
 
 class Product:
     @staticmethod
@@ -15,36 +18,46 @@ class Product:
         try:
             cursor = connection.cursor(dictionary=True)
             
+            dimension_ids = Catalog.resolve_ids(cursor, {
+                'category': data.get('category'),
+                'supplier': data.get('supplier'),
+            })
+            
             query = """
                 INSERT INTO products 
-                (barcode, name, category, quantity_in_stock, unit, buying_price, 
-                 selling_price, expiry_date, supplier, status, description)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                (barcode, name, category, category_id, quantity_in_stock, unit, buying_price, 
+                 selling_price, expiry_date, supplier, supplier_id, status, description)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
             
             values = (
                 data.get('barcode'),
                 data.get('name'),
                 data.get('category'),
+                dimension_ids['category_id'],
                 data.get('quantity_in_stock', 0),
                 data.get('unit', 'piece'),
                 data.get('buying_price'),
                 data.get('selling_price'),
                 data.get('expiry_date'),
                 data.get('supplier'),
+                dimension_ids['supplier_id'],
                 data.get('status', 'In stock'),
                 data.get('description')
             )
             
             cursor.execute(query, values)
-            connection.commit()
-            
             product_id = cursor.lastrowid
             
             # Fetch the created product
             cursor.execute("SELECT * FROM products WHERE product_id = %s", (product_id,))
             product = cursor.fetchone()
             
+            kpi_deltas = InventoryKPI.apply_deltas(cursor, [(None, product)])
+            connection.commit()
+            InventoryKPI.note_deltas(kpi_deltas)
+            response_cache.invalidate('product-list')
+            
             cursor.close()
             return True, product, 201
             
@@ -59,18 +72,32 @@ class Product:
             close_db_connection(connection)
     
     @staticmethod
-    def get_all():
+    def get_all(filters=None):
         """
-        Retrieve all products from the database.
+        Retrieve all products from the database, optionally filtered by
+        category_id and/or supplier_id.
         Returns (success, result/error_message, status_code)
         """
-        connection = get_db_connection()
+        connection = get_db_connection(read_only=True)
         if not connection:
             return False, "Database connection failed", 500
         
         try:
             cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM products ORDER BY created_at DESC")
+            
+            conditions = []
+            values = []
+            for field in ['category_id', 'supplier_id']:
+                if filters and filters.get(field) is not None:
+                    conditions.append(f"{field} = %s")
+                    values.append(filters[field])
+            
+            query = "SELECT * FROM products"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY created_at DESC"
+            
+            cursor.execute(query, values)
             products = cursor.fetchall()
             cursor.close()
             return True, products, 200
@@ -86,7 +113,7 @@ class Product:
         Retrieve a single product by ID.
         Returns (success, result/error_message, status_code)
         """
-        connection = get_db_connection()
+        connection = get_db_connection(read_only=True)
         if not connection:
             return False, "Database connection failed", 500
         
@@ -119,9 +146,10 @@ class Product:
         try:
             cursor = connection.cursor(dictionary=True)
             
-            # Check if product exists
-            cursor.execute("SELECT * FROM products WHERE product_id = %s", (product_id,))
-            if not cursor.fetchone():
+            # Check if product exists (and lock it for the KPI delta)
+            cursor.execute("SELECT * FROM products WHERE product_id = %s FOR UPDATE", (product_id,))
+            before = cursor.fetchone()
+            if not before:
                 cursor.close()
                 return False, "Product not found", 404
             
@@ -138,6 +166,11 @@ class Product:
                     update_fields.append(f"{field} = %s")
                     values.append(data[field])
             
+            # Keep the category/supplier foreign keys in step with the names
+            for field, dimension_id in Catalog.resolve_ids(cursor, data, before).items():
+                update_fields.append(f"{field} = %s")
+                values.append(dimension_id)
+            
             if not update_fields:
                 cursor.close()
                 return False, "No valid fields to update", 400
@@ -146,12 +179,16 @@ class Product:
             query = f"UPDATE products SET {', '.join(update_fields)} WHERE product_id = %s"
             
             cursor.execute(query, values)
-            connection.commit()
             
             # Fetch the updated product
             cursor.execute("SELECT * FROM products WHERE product_id = %s", (product_id,))
             product = cursor.fetchone()
             
+            kpi_deltas = InventoryKPI.apply_deltas(cursor, [(before, product)])
+            connection.commit()
+            InventoryKPI.note_deltas(kpi_deltas)
+            response_cache.invalidate(f'product:{product_id}', 'product-list')
+            
             cursor.close()
             return True, product, 200
             
@@ -178,14 +215,18 @@ class Product:
         try:
             cursor = connection.cursor(dictionary=True)
             
-            # Check if product exists
-            cursor.execute("SELECT * FROM products WHERE product_id = %s", (product_id,))
-            if not cursor.fetchone():
+            # Check if product exists (and lock it for the KPI delta)
+            cursor.execute("SELECT * FROM products WHERE product_id = %s FOR UPDATE", (product_id,))
+            product = cursor.fetchone()
+            if not product:
                 cursor.close()
                 return False, "Product not found", 404
             
             cursor.execute("DELETE FROM products WHERE product_id = %s", (product_id,))
+            kpi_deltas = InventoryKPI.apply_deltas(cursor, [(product, None)])
             connection.commit()
+            InventoryKPI.note_deltas(kpi_deltas)
+            response_cache.invalidate(f'product:{product_id}', 'product-list')
             cursor.close()
             
             return True, {"message": "Product deleted successfully"}, 200
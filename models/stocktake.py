@@ -0,0 +1,269 @@
+from collections import Counter
+
+from db import get_db_connection, close_db_connection
+from mysql.connector import Error
+from models.inventory_kpi import InventoryKPI
+from utils.response_cache import response_cache
+
+class Stocktake:
+    """
+    Stocktake (cycle count) sessions. Scans are summed per barcode into the
+    stocktake_counts staging table; the variance report and the adjustments
+    are single set-based statements against products.
+    """
+
+    @staticmethod
+    def create(data):
+        """
+        Open a new stocktake session.
+        Returns (success, result/error_message, status_code)
+        """
+        connection = get_db_connection()
+        if not connection:
+            return False, "Database connection failed", 500
+
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("INSERT INTO stocktake_sessions (name) VALUES (%s)", (data.get('name'),))
+            session_id = cursor.lastrowid
+            cursor.execute("SELECT * FROM stocktake_sessions WHERE session_id = %s", (session_id,))
+            session = cursor.fetchone()
+            connection.commit()
+            cursor.close()
+            return True, session, 201
+
+        except Error as e:
+            return False, f"Database error: {str(e)}", 500
+        finally:
+            close_db_connection(connection)
+
+    @staticmethod
+    def get(session_id):
+        """
+        Retrieve a session with the number of distinct barcodes counted so far.
+        Returns (success, result/error_message, status_code)
+        """
+        connection = get_db_connection(read_only=True)
+        if not connection:
+            return False, "Database connection failed", 500
+
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT s.*, COUNT(c.barcode) AS counted_items
+                FROM stocktake_sessions s
+                LEFT JOIN stocktake_counts c ON c.session_id = s.session_id
+                WHERE s.session_id = %s
+                GROUP BY s.session_id
+            """, (session_id,))
+            session = cursor.fetchone()
+            cursor.close()
+
+            if not session:
+                return False, "Stocktake session not found", 404
+            return True, session, 200
+
+        except Error as e:
+            return False, f"Database error: {str(e)}", 500
+        finally:
+            close_db_connection(connection)
+
+    @staticmethod
+    def add_scans(session_id, scans):
+        """
+        Add a batch of scans, an iterable of (barcode, count) pairs, to an open
+        session. Repeated barcodes are summed in memory first, then written
+        with one multi-row upsert.
+        Returns (success, result/error_message, status_code)
+        """
+        counts = Counter()
+        scanned = 0
+        for barcode, count in scans:
+            counts[barcode] += count
+            scanned += 1
+
+        connection = get_db_connection()
+        if not connection:
+            return False, "Database connection failed", 500
+
+        try:
+            cursor = connection.cursor(dictionary=True)
+
+            # Exclusive from the start: this batch updates scan_count on the
+            # session row, and two shared locks upgrading to exclusive deadlock.
+            # Batches of one session run one at a time; each is a short upsert.
+            cursor.execute(
+                "SELECT status FROM stocktake_sessions WHERE session_id = %s FOR UPDATE",
+                (session_id,))
+            session = cursor.fetchone()
+            if not session:
+                connection.rollback()
+                cursor.close()
+                return False, "Stocktake session not found", 404
+            if session['status'] != 'open':
+                connection.rollback()
+                cursor.close()
+                return False, f"Stocktake session is {session['status']}", 409
+
+            if counts:
+                cursor.executemany("""
+                    INSERT INTO stocktake_counts (session_id, barcode, counted_qty)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE counted_qty = counted_qty + VALUES(counted_qty)
+                """, [(session_id, barcode, count) for barcode, count in counts.items()])
+                cursor.execute(
+                    "UPDATE stocktake_sessions SET scan_count = scan_count + %s WHERE session_id = %s",
+                    (scanned, session_id))
+            connection.commit()
+            cursor.close()
+            return True, {"scans": scanned, "barcodes": len(counts)}, 200
+
+        except Error as e:
+            connection.rollback()
+            return False, f"Database error: {str(e)}", 500
+        finally:
+            close_db_connection(connection)
+
+    @staticmethod
+    def get_variance(session_id, differences_only=False):
+        """
+        Compare the counted quantities with the stock on record, in one query.
+        Barcodes that match no product are reported separately.
+        Returns (success, result/error_message, status_code)
+        """
+        success, session, status_code = Stocktake.get(session_id)
+        if not success:
+            return success, session, status_code
+
+        connection = get_db_connection(read_only=True)
+        if not connection:
+            return False, "Database connection failed", 500
+
+        try:
+            cursor = connection.cursor(dictionary=True)
+            query = """
+                SELECT c.barcode, p.product_id, p.name, p.qty AS expected_qty, c.counted_qty,
+                       c.counted_qty - p.qty AS variance,
+                       (c.counted_qty - p.qty) * p.buying_price AS variance_value
+                FROM stocktake_counts c
+                LEFT JOIN products p ON p.barcode = c.barcode
+                WHERE c.session_id = %s
+            """
+            if differences_only:
+                query += " AND (p.product_id IS NULL OR c.counted_qty <> p.qty)"
+            query += " ORDER BY ABS(c.counted_qty - p.qty) * p.buying_price DESC"
+            cursor.execute(query, (session_id,))
+            rows = cursor.fetchall()
+            cursor.close()
+
+            items = [row for row in rows if row['product_id'] is not None]
+            unknown = [{'barcode': row['barcode'], 'counted_qty': row['counted_qty']}
+                       for row in rows if row['product_id'] is None]
+            return True, {
+                "session": session,
+                "items": items,
+                "unknown_barcodes": unknown,
+                "summary": {
+                    "items": len(items),
+                    "items_with_variance": sum(1 for row in items if row['variance']),
+                    "units_over": sum(row['variance'] for row in items if row['variance'] > 0),
+                    "units_short": -sum(row['variance'] for row in items if row['variance'] < 0),
+                    "variance_value": float(sum(row['variance_value'] for row in items)),
+                },
+            }, 200
+
+        except Error as e:
+            return False, f"Database error: {str(e)}", 500
+        finally:
+            close_db_connection(connection)
+
+    @staticmethod
+    def apply(session_id, barcodes=None):
+        """
+        Set the stock of every counted product (or only the approved barcodes)
+        to its counted quantity with one batched UPDATE, and close the session.
+        Returns (success, result/error_message, status_code)
+        """
+        connection = get_db_connection()
+        if not connection:
+            return False, "Database connection failed", 500
+
+        try:
+            cursor = connection.cursor(dictionary=True)
+
+            # Waits for an in-flight scan batch, blocks new ones
+            cursor.execute(
+                "SELECT status FROM stocktake_sessions WHERE session_id = %s FOR UPDATE",
+                (session_id,))
+            session = cursor.fetchone()
+            if not session:
+                connection.rollback()
+                cursor.close()
+                return False, "Stocktake session not found", 404
+            if session['status'] != 'open':
+                connection.rollback()
+                cursor.close()
+                return False, f"Stocktake session is {session['status']}", 409
+
+            condition = "c.session_id = %s AND c.counted_qty <> p.qty"
+            values = [session_id]
+            if barcodes is not None:
+                if not barcodes:
+                    connection.rollback()
+                    cursor.close()
+                    return False, "No barcodes approved", 400
+                condition += f" AND c.barcode IN ({', '.join(['%s'] * len(barcodes))})"
+                values.extend(barcodes)
+
+            # Lock the products being adjusted (and read them for the KPI deltas)
+            cursor.execute(f"""
+                SELECT p.*, c.counted_qty
+                FROM products p
+                JOIN stocktake_counts c ON c.barcode = p.barcode
+                WHERE {condition}
+                FOR UPDATE
+            """, values)
+            changes = []
+            for before in cursor.fetchall():
+                counted_qty = before.pop('counted_qty')
+                changes.append((before, dict(before, qty=counted_qty, quantity_in_stock=counted_qty)))
+
+            if changes:
+                cursor.execute(f"""
+                    UPDATE products p
+                    JOIN stocktake_counts c ON c.barcode = p.barcode
+                    SET p.qty = c.counted_qty, p.quantity_in_stock = c.counted_qty
+                    WHERE {condition}
+                """, values)
+
+            kpi_deltas = InventoryKPI.apply_deltas(cursor, changes)
+            cursor.execute("""
+                UPDATE stocktake_sessions
+                SET status = 'applied', applied_at = NOW(), adjusted_items = %s
+                WHERE session_id = %s
+            """, (len(changes), session_id))
+            connection.commit()
+            InventoryKPI.note_deltas(kpi_deltas)
+            if changes:
+                response_cache.invalidate('product-list', *(f"product:{before['product_id']}" for before, _ in changes))
+            cursor.close()
+
+            return True, {
+                "message": "Stocktake applied successfully",
+                "adjusted_items": len(changes),
+                "adjustments": [
+                    {
+                        "product_id": before['product_id'],
+                        "barcode": before['barcode'],
+                        "previous_qty": before['qty'],
+                        "counted_qty": after['qty'],
+                    }
+                    for before, after in changes
+                ],
+            }, 200
+
+        except Error as e:
+            connection.rollback()
+            return False, f"Database error: {str(e)}", 500
+        finally:
+            close_db_connection(connection)
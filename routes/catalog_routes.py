@@ -0,0 +1,33 @@
+from flask import Blueprint, jsonify
+from models.catalog import Catalog
+
+catalog_bp = Blueprint('catalog', __name__)
+
+def _facets_response(field, key):
+    try:
+        success, result, status_code = Catalog.get_facets(field)
+        
+        if success:
+            return jsonify({
+                "count": len(result),
+                key: result
+            }), status_code
+        else:
+            return jsonify({"error": result}), status_code
+            
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@catalog_bp.route('/categories', methods=['GET'])
+def get_categories():
+    """
+    Get all categories with their product count and stock value.
+    """
+    return _facets_response('category', 'categories')
+
+@catalog_bp.route('/suppliers', methods=['GET'])
+def get_suppliers():
+    """
+    Get all suppliers with their product count and stock value.
+    """
+    return _facets_response('supplier', 'suppliers')
@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify
+from models.inventory_kpi import InventoryKPI
+
+kpi_bp = Blueprint('kpis', __name__)
+
+@kpi_bp.route('/kpis', methods=['GET'])
+def get_kpis():
+    """
+    Get the inventory valuation and product count snapshot.
+    Served from the incrementally maintained summary, without scanning products.
+    by_category and by_supplier are keyed by category_id and supplier_id.
+    """
+    try:
+        success, result, status_code = InventoryKPI.get_snapshot()
+        
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+            
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models.product import Product
-from utils.validators import validate_product_data
+from utils.validators import PRODUCT_SCHEMA
+from utils.response_cache import response_cache
 
 product_bp = Blueprint('products', __name__)
 
@@ -16,10 +17,10 @@ def create_product():
         if not data:
             return jsonify({"error": "Request body must be JSON"}), 400
         
-        # Validate input data
-        is_valid, error_msg = validate_product_data(data)
-        if not is_valid:
-            return jsonify({"error": error_msg}), 400
+        # Validate input data (values come back coerced, e.g. "5" -> 5)
+        data, errors = PRODUCT_SCHEMA.load(data)
+        if errors:
+            return jsonify({"error": "; ".join(errors.values()), "errors": errors}), 400
         
         # Create product
         success, result, status_code = Product.create(data)
@@ -36,12 +37,18 @@ def create_product():
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 @product_bp.route('/products', methods=['GET'])
+@response_cache.cached(lambda: ['product-list'])
 def get_all_products():
     """
     Get all products in the system.
+    Optional query parameters: category_id, supplier_id.
     """
     try:
-        success, result, status_code = Product.get_all()
+        filters = {
+            'category_id': request.args.get('category_id', type=int),
+            'supplier_id': request.args.get('supplier_id', type=int),
+        }
+        success, result, status_code = Product.get_all(filters)
         
         if success:
             return jsonify({
@@ -55,6 +62,7 @@ def get_all_products():
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 @product_bp.route('/products/<int:product_id>', methods=['GET'])
+@response_cache.cached(lambda product_id: [f'product:{product_id}'])
 def get_product(product_id):
     """
     Get a single product by ID.
@@ -83,9 +91,9 @@ def update_product(product_id):
             return jsonify({"error": "Request body must be JSON"}), 400
         
         # Validate input data (for update)
-        is_valid, error_msg = validate_product_data(data, is_update=True)
-        if not is_valid:
-            return jsonify({"error": error_msg}), 400
+        data, errors = PRODUCT_SCHEMA.load(data, partial=True)
+        if errors:
+            return jsonify({"error": "; ".join(errors.values()), "errors": errors}), 400
         
         # Update product
         success, result, status_code = Product.update(product_id, data)
@@ -115,4 +123,4 @@ def delete_product(product_id):
             return jsonify({"error": result}), status_code
             
     except Exception as e:
-        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
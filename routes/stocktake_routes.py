@@ -0,0 +1,173 @@
+import json
+
+from flask import Blueprint, request, jsonify
+from models.stocktake import Stocktake
+from utils.validators import STOCKTAKE_SCHEMA, STOCKTAKE_SCAN_SCHEMA
+
+stocktake_bp = Blueprint('stocktakes', __name__)
+
+# Streamed scans are written in batches of this many lines
+SCAN_BATCH_SIZE = 1000
+
+@stocktake_bp.route('/stocktakes', methods=['POST'])
+def create_stocktake():
+    """
+    Open a new stocktake session.
+    Optional JSON body: {"name": "..."}
+    """
+    try:
+        data = request.get_json(silent=True)
+        data, errors = STOCKTAKE_SCHEMA.load({} if data is None else data)
+        if errors:
+            return jsonify({"error": "; ".join(errors.values()), "errors": errors}), 400
+
+        success, result, status_code = Stocktake.create(data)
+
+        if success:
+            return jsonify({
+                "message": "Stocktake session created successfully",
+                "session": result
+            }), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@stocktake_bp.route('/stocktakes/<int:session_id>', methods=['GET'])
+def get_stocktake(session_id):
+    """
+    Get a stocktake session and how many barcodes it has counted.
+    """
+    try:
+        success, result, status_code = Stocktake.get(session_id)
+
+        if success:
+            return jsonify({"session": result}), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@stocktake_bp.route('/stocktakes/<int:session_id>/scans', methods=['POST'])
+def add_stocktake_scans(session_id):
+    """
+    Add scans to a session. Either a JSON body
+    {"scans": [{"barcode": "...", "count": 1}, ...]}
+    or an application/x-ndjson stream with one scan object per line,
+    written in batches as it arrives. count defaults to 1.
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            return _add_streamed_scans(session_id)
+
+        data = request.get_json(silent=True)
+        scans = data.get('scans') if isinstance(data, dict) else None
+        if not isinstance(scans, list):
+            return jsonify({"error": "Request body must be JSON with a 'scans' list"}), 400
+
+        scans, errors = STOCKTAKE_SCAN_SCHEMA.load_many(scans)
+        if errors:
+            errors = {
+                f"scans[{index}].{key}": error
+                for index, scan_errors in errors.items()
+                for key, error in scan_errors.items()
+            }
+            return jsonify({"error": "; ".join(errors.values()), "errors": errors}), 400
+
+        success, result, status_code = Stocktake.add_scans(session_id, map(_scan_pair, scans))
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+def _add_streamed_scans(session_id):
+    """
+    Validate and write an NDJSON scan stream batch by batch. Batches already
+    written stay in the session when a later line is invalid.
+    """
+    totals = {"scans": 0}
+    batch = []
+    for line_number, line in enumerate(request.stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            scan = json.loads(line)
+        except ValueError:
+            scan = None
+        scan, errors = STOCKTAKE_SCAN_SCHEMA.load(scan)
+        if errors:
+            return jsonify({
+                "error": f"Line {line_number}: " + "; ".join(errors.values()),
+                "errors": errors,
+                "accepted": totals
+            }), 400
+        batch.append(_scan_pair(scan))
+
+        if len(batch) >= SCAN_BATCH_SIZE:
+            success, result, status_code = Stocktake.add_scans(session_id, batch)
+            if not success:
+                return jsonify({"error": result, "accepted": totals}), status_code
+            totals["scans"] += result["scans"]
+            batch = []
+
+    success, result, status_code = Stocktake.add_scans(session_id, batch)
+    if not success:
+        return jsonify({"error": result, "accepted": totals}), status_code
+    totals["scans"] += result["scans"]
+    return jsonify(totals), status_code
+
+def _scan_pair(scan):
+    count = scan.get('count')
+    return scan['barcode'], 1 if count is None or count == '' else count
+
+@stocktake_bp.route('/stocktakes/<int:session_id>/variance', methods=['GET'])
+def get_stocktake_variance(session_id):
+    """
+    Variance report: counted vs. recorded quantity per product.
+    Optional query parameter: differences_only=true
+    """
+    try:
+        differences_only = request.args.get('differences_only', '').lower() in ('1', 'true', 'yes')
+        success, result, status_code = Stocktake.get_variance(session_id, differences_only)
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@stocktake_bp.route('/stocktakes/<int:session_id>/apply', methods=['POST'])
+def apply_stocktake(session_id):
+    """
+    Apply the counted quantities and close the session.
+    Optional JSON body {"barcodes": [...]} to apply only approved barcodes.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        elif not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        barcodes = data.get('barcodes')
+        if barcodes is not None and (not isinstance(barcodes, list)
+                                     or not all(isinstance(barcode, str) for barcode in barcodes)):
+            return jsonify({"error": "'barcodes' must be a list of strings"}), 400
+
+        success, result, status_code = Stocktake.apply(session_id, barcodes)
+
+        if success:
+            return jsonify(result), status_code
+        else:
+            return jsonify({"error": result}), status_code
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500